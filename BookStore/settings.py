@@ -82,6 +82,12 @@ DATABASES = {
 }
 
 
+# Authentication backends
+# Loads the cart, wishlist and reader profile together with the session user
+
+AUTHENTICATION_BACKENDS = ['bookapp.backends.ProfileModelBackend']
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,5 +1,16 @@
+import hashlib
+from decimal import Decimal
+
 from django.contrib import admin, messages
-from django.contrib.auth.models import Group
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, F, Sum
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
@@ -9,10 +20,78 @@ from .models import Author, Genre, Reader, Book, Cart, CartItem, WishlistItem, W
 admin.site.unregister(Group)
 
 
+CENTS = Decimal('0.01')
+
+
+def rupees(amount):
+    """Format an (annotated) Decimal amount for display, e.g. ₹499.00"""
+    return f"₹{Decimal(amount or 0).quantize(CENTS)}"
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that caches the changelist COUNT(*) for a short time"""
+    count_timeout = 60
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except (AttributeError, EmptyResultSet):
+            return super().count
+
+        key = 'admin_count:' + hashlib.sha1(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.count_timeout)
+        return count
+
+
+class CachedUserListFilter(admin.SimpleListFilter):
+    """User sidebar filter whose options are cached instead of queried on every page load"""
+    title = 'user'
+    user_lookup = None
+    cache_timeout = 300
+
+    def lookups(self, request, model_admin):
+        return cache.get_or_set(
+            f'admin_filter:{self.parameter_name}',
+            lambda: list(
+                User.objects.filter(**{self.user_lookup: False}).distinct()
+                .order_by('username').values_list('id', 'username')
+            ),
+            self.cache_timeout,
+        )
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class CartUserListFilter(CachedUserListFilter):
+    parameter_name = 'cart__user'
+    user_lookup = 'cart__items__isnull'
+
+
+class WishlistUserListFilter(CachedUserListFilter):
+    parameter_name = 'wishlist__user'
+    user_lookup = 'wishlist__items__isnull'
+
+
+class DeferringChangeList(ChangeList):
+    """ChangeList that skips the columns listed in ModelAdmin.changelist_defer"""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.changelist_defer)
+
+
 class AuthorAdmin(admin.ModelAdmin):
     list_display = ['name', 'book_count', 'photo_preview']
     list_filter = ['name']
     search_fields = ['name', 'bio']
+    ordering = ['name']
     fieldsets = [
         ('Basic Information', {
             'fields': ['name', 'bio']
@@ -23,10 +102,15 @@ class AuthorAdmin(admin.ModelAdmin):
         }),
     ]
     readonly_fields = ['photo_preview']
+    changelist_defer = ['bio']
+
+    def get_changelist(self, request, **kwargs):
+        return DeferringChangeList
 
     def book_count(self, obj):
-        return obj.books.count()
+        return obj.book_count
     book_count.short_description = 'Number of Books'
+    book_count.admin_order_field = 'book_count'
 
     def photo_preview(self, obj):
         if obj.photo:
@@ -39,12 +123,16 @@ class GenreAdmin(admin.ModelAdmin):
     list_display = ['name', 'parent', 'is_main_genre', 'book_count']
     list_filter = ['parent']
     search_fields = ['name']
+    ordering = ['name']
     fieldsets = [
         ('Genre Information', {
             'fields': ['name', 'parent', 'description']
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_book_count=Count('books'))
+
     def is_main_genre(self, obj):
         return obj.is_main_genre
 
@@ -52,19 +140,25 @@ class GenreAdmin(admin.ModelAdmin):
     is_main_genre.boolean = True
 
     def book_count(self, obj):
-        return obj.books.count()
+        return obj._book_count
 
     book_count.short_description = 'Books in Genre'
+    book_count.admin_order_field = '_book_count'
 
 
 class BookAdmin(admin.ModelAdmin):
     list_display = ['title', 'display_authors', 'publication_year', 'price', 'book_type', 'stock', 'is_available',
                     'has_pdf']
     list_filter = ['book_type', 'publication_year', 'genre', 'genre__parent']
-    search_fields = ['title', 'isbn', 'authors__name']
+    search_fields = ['title', 'isbn', 'author_names']
     readonly_fields = ['created_at', 'updated_at', 'pdf_preview', 'pdf_file_size_display']
     list_editable = ['price', 'stock']
-    filter_horizontal = ['authors']
+    autocomplete_fields = ['authors']
+    list_per_page = 50
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+    # book_pdf stays loaded for the has_pdf column
+    changelist_defer = ['summary', 'tags', 'cover_image']
 
     # Add PDF to fieldsets
     fieldsets = [
@@ -84,10 +178,17 @@ class BookAdmin(admin.ModelAdmin):
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('genre', 'genre__parent')
+
+    def get_changelist(self, request, **kwargs):
+        return DeferringChangeList
+
     def display_authors(self, obj):
-        return ", ".join([author.name for author in obj.authors.all()])
+        return obj.author_names
 
     display_authors.short_description = 'Authors'
+    display_authors.admin_order_field = 'author_names'
 
     def is_available(self, obj):
         return obj.stock > 0
@@ -105,11 +206,12 @@ class BookAdmin(admin.ModelAdmin):
     # PDF preview method
     def pdf_preview(self, obj):
         if obj.book_pdf:
+            # Resolve the storage URL once; signed-URL backends pay per call
+            url = obj.book_pdf.url
             return format_html(
-                '<a href="{}" target="_blank" class="button">📄 View PDF</a>&nbsp;'
-                '<a href="{}" download class="button">📥 Download PDF</a>',
-                obj.book_pdf.url,
-                obj.book_pdf.url
+                '<a href="{0}" target="_blank" class="button">📄 View PDF</a>&nbsp;'
+                '<a href="{0}" download class="button">📥 Download PDF</a>',
+                url
             )
         return "No PDF uploaded"
 
@@ -117,7 +219,7 @@ class BookAdmin(admin.ModelAdmin):
 
     # PDF file size display
     def pdf_file_size_display(self, obj):
-        if obj.book_pdf and obj.book_pdf.size:
+        if obj.book_pdf and obj.pdf_size_bytes:
             return obj.pdf_file_size
         return "No PDF"
 
@@ -164,31 +266,27 @@ class BookAdmin(admin.ModelAdmin):
 
     # New action to clear PDFs
     def clear_pdfs(self, request, queryset):
-        updated = 0
-        for book in queryset:
-            if book.book_pdf:
-                book.book_pdf.delete(save=False)
-                book.book_pdf = None
-                book.save()
-                updated += 1
+        books_with_pdf = queryset.exclude(book_pdf__isnull=True).exclude(book_pdf='')
+        pdf_names = list(books_with_pdf.values_list('book_pdf', flat=True))
+
+        # Clear the column in one UPDATE, then remove the files from storage
+        updated = books_with_pdf.update(book_pdf=None, pdf_size_bytes=None, updated_at=timezone.now())
+        storage = Book._meta.get_field('book_pdf').storage
+        for name in pdf_names:
+            storage.delete(name)
+
         self.message_user(request, f'PDFs cleared from {updated} books.')
 
     clear_pdfs.short_description = "Clear PDF files"
 
-    # New action to generate sample PDF (placeholder for your PDF generation logic)
+    # Pre-render the generated eBook PDFs so later downloads are served from the cache
     def generate_sample_pdf(self, request, queryset):
-        from django.http import HttpResponse
-        # This is a placeholder - implement your PDF generation logic here
-        processed = 0
-        for book in queryset:
-            # Example: You would call your PDF generation function here
-            # pdf_file = generate_ebook_pdf(book)
-            # book.book_pdf.save(f"{book.isbn}.pdf", pdf_file)
-            processed += 1
-        self.message_user(request,
-                          f'Sample PDF generation triggered for {processed} books. Implement PDF generation logic.')
-
-    generate_sample_pdf.short_description = "Generate sample PDF (placeholder)"
+        from .utils import generate_pdfs_bulk
+        pdfs = generate_pdfs_bulk(queryset.select_related('genre').prefetch_related('authors'))
+        generated = sum(1 for pdf in pdfs.values() if pdf is not None)
+        self.message_user(request, f'Generated eBook PDFs for {generated} of {len(pdfs)} books.')
+
+    generate_sample_pdf.short_description = "Generate eBook PDFs"
 
     # Add custom CSS for better PDF upload field styling
     class Media:
@@ -201,8 +299,9 @@ class ReaderAdmin(admin.ModelAdmin):
     list_display = ['username', 'email', 'full_name', 'date_of_birth', 'age', 'interests_count', 'date_joined']
     list_filter = ['date_of_birth', 'user__date_joined']
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'user__email', 'bio']
+    list_select_related = ['user']
     readonly_fields = ['age', 'created_at', 'updated_at']
-    filter_horizontal = ['interests']
+    autocomplete_fields = ['interests']
     fieldsets = [
         ('User Account', {
             'fields': ['user']
@@ -219,6 +318,9 @@ class ReaderAdmin(admin.ModelAdmin):
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_age().annotate(_interests_count=Count('interests'))
+
     def username(self, obj):
         return obj.user.username
 
@@ -240,27 +342,60 @@ class ReaderAdmin(admin.ModelAdmin):
     date_joined.short_description = 'Date Joined'
 
     def age(self, obj):
-        return obj.age
+        return obj.current_age
 
     age.short_description = 'Age'
+    age.admin_order_field = 'current_age'
 
     def interests_count(self, obj):
-        return obj.interests.count()
+        return obj._interests_count
 
     interests_count.short_description = 'Interests'
+    interests_count.admin_order_field = '_interests_count'
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset that only loads one page of the existing rows"""
+    per_page = 50
+    page_number = None
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            self.page = Paginator(queryset, self.per_page).get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    per_page = 50
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(f'{formset.get_default_prefix()}-page')
+        return formset
 
-class CartItemInline(admin.TabularInline):
+
+class CartItemInline(PaginatedTabularInline):
     model = CartItem
     extra = 0
     readonly_fields = ['added_at', 'total_price']
     fields = ['book', 'quantity', 'total_price', 'added_at']
+    autocomplete_fields = ['book']
+
+    def get_queryset(self, request):
+        # total_price reads book.price
+        return super().get_queryset(request).select_related('book')
 
 
 class CartAdmin(admin.ModelAdmin):
     list_display = ['user', 'total_items', 'total_price', 'created_at']
-    list_filter = ['created_at']
+    date_hierarchy = 'created_at'
     search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
     readonly_fields = ['created_at', 'updated_at', 'total_items_display', 'total_price_display']
     inlines = [CartItemInline]
     fieldsets = [
@@ -273,39 +408,68 @@ class CartAdmin(admin.ModelAdmin):
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _total_items=Sum('items__quantity'),
+            _total_price=Sum(F('items__quantity') * F('items__book__price'), output_field=DecimalField()),
+        )
+
+    def total_items(self, obj):
+        return obj._total_items or 0
+
+    total_items.short_description = 'Total Items'
+    total_items.admin_order_field = '_total_items'
+
+    def total_price(self, obj):
+        return obj._total_price or 0
+
+    total_price.short_description = 'Total Price'
+    total_price.admin_order_field = '_total_price'
+
     def total_items_display(self, obj):
-        return obj.total_items
+        return obj._total_items or 0
 
     total_items_display.short_description = 'Total Items'
+    total_items_display.admin_order_field = '_total_items'
 
     def total_price_display(self, obj):
-        return f"₹{obj.total_price}"
+        return rupees(obj._total_price)
 
     total_price_display.short_description = 'Total Price'
+    total_price_display.admin_order_field = '_total_price'
 
 
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ['book', 'cart', 'quantity', 'total_price', 'added_at']
-    list_filter = ['added_at', 'cart__user']
+    list_filter = [CartUserListFilter]
+    date_hierarchy = 'added_at'
     search_fields = ['book__title', 'cart__user__username']
+    list_select_related = ['book', 'cart__user']
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['added_at', 'total_price_display']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_line_totals()
+
     def total_price_display(self, obj):
-        return f"₹{obj.total_price}"
+        return rupees(obj.line_total)
 
     total_price_display.short_description = 'Total Price'
 
 
-class WishlistItemInline(admin.TabularInline):
+class WishlistItemInline(PaginatedTabularInline):
     model = WishlistItem
     extra = 0
     readonly_fields = ['added_at']
     fields = ['book', 'added_at']
+    autocomplete_fields = ['book']
 
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ['user', 'total_items', 'created_at']
-    list_filter = ['created_at']
+    date_hierarchy = 'created_at'
     search_fields = ['user__username', 'user__email']
+    list_select_related = ['user']
     readonly_fields = ['created_at', 'updated_at', 'total_items_display']
     inlines = [WishlistItemInline]
     fieldsets = [
@@ -318,33 +482,52 @@ class WishlistAdmin(admin.ModelAdmin):
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_total_items=Count('items'))
+
+    def total_items(self, obj):
+        return obj._total_items
+    total_items.short_description = 'Total Items'
+    total_items.admin_order_field = '_total_items'
+
     def total_items_display(self, obj):
-        return obj.total_items
+        return obj._total_items
     total_items_display.short_description = 'Total Items'
+    total_items_display.admin_order_field = '_total_items'
 
 class WishlistItemAdmin(admin.ModelAdmin):
     list_display = ['book', 'wishlist', 'added_at']
-    list_filter = ['added_at', 'wishlist__user']
+    list_filter = ['added_at', WishlistUserListFilter]
     search_fields = ['book__title', 'wishlist__user__username']
+    list_select_related = ['book', 'wishlist__user']
     readonly_fields = ['added_at']
 
 
-class OrderItemInline(admin.TabularInline):
+class OrderItemInline(PaginatedTabularInline):
     model = OrderItem
     extra = 0
     readonly_fields = ['total_price_display']
     fields = ['book', 'book_type', 'quantity', 'price', 'total_price_display']
+    autocomplete_fields = ['book']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_line_totals()
 
     def total_price_display(self, obj):
-        return f"₹{obj.total_price}"
+        return rupees(obj.line_total)
 
     total_price_display.short_description = 'Total'
 
 
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_id', 'user', 'total_amount', 'order_status', 'payment_status', 'created_at',]
-    list_filter = ['order_status', 'payment_status', 'created_at', 'has_physical_books']
+    list_filter = ['order_status', 'payment_status', 'has_physical_books']
+    date_hierarchy = 'created_at'
     search_fields = ['order_id', 'user__username', 'user__email', 'tracking_number']
+    list_select_related = ['user']
+    list_per_page = 50
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     readonly_fields = ['created_at', 'updated_at', 'total_items_display', 'is_digital_only_display']
     inlines = [OrderItemInline]
     fieldsets = [
@@ -367,13 +550,22 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_summary()
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Inline item edits can change whether the order ships anything
+        form.instance.update_has_physical_books()
+
     def total_items_display(self, obj):
-        return obj.total_items
+        return obj.total_qty
 
     total_items_display.short_description = 'Total Items'
+    total_items_display.admin_order_field = 'total_qty'
 
     def is_digital_only_display(self, obj):
-        return obj.is_digital_only
+        return not obj.has_physical
 
     is_digital_only_display.short_description = 'Digital Only'
     is_digital_only_display.boolean = True
@@ -389,9 +581,15 @@ class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'book', 'book_type', 'quantity', 'price', 'total_price_display']
     list_filter = ['book_type', 'order__order_status']
     search_fields = ['order__order_id', 'book__title']
+    list_select_related = ['order__user', 'book']
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_line_totals()
 
     def total_price_display(self, obj):
-        return f"₹{obj.total_price}"
+        return rupees(obj.line_total)
 
     total_price_display.short_description = 'Total Price'
 
@@ -412,28 +610,18 @@ class PaymentAdmin(admin.ModelAdmin):
     readonly_fields = [
         'created_at', 'updated_at', 'refunded_at'
     ]
+    list_select_related = ['order__user', 'user']
     list_per_page = 20
 
 
-# Register models with default admin site
+# Register models with default admin site (site headers are set in BookappConfig.ready)
 admin.site.register(Author, AuthorAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Book, BookAdmin)
 admin.site.register(Reader, ReaderAdmin)
-
-# Customize admin site header
-admin.site.site_header = 'BookNook Administration'
-admin.site.site_title = 'BookNook Admin'
-admin.site.index_title = 'Book Management System'
-
-# Register the cart models
 admin.site.register(Cart, CartAdmin)
 admin.site.register(CartItem, CartItemAdmin)
-
-# Register the wishlist models
 admin.site.register(Wishlist, WishlistAdmin)
 admin.site.register(WishlistItem, WishlistItemAdmin)
-
-# Register order models
 admin.site.register(Order, OrderAdmin)
-admin.site.register(OrderItem, OrderItemAdmin)
\ No newline at end of file
+admin.site.register(OrderItem, OrderItemAdmin)
@@ -5,3 +5,13 @@ class BookappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookapp'
     verbose_name = 'BookNook Management'
+
+    def ready(self):
+        from django.contrib import admin
+
+        from . import signals  # noqa: F401
+
+        # Customize admin site header
+        admin.site.site_header = 'BookNook Administration'
+        admin.site.site_title = 'BookNook Admin'
+        admin.site.index_title = 'Book Management System'
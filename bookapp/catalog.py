@@ -0,0 +1,37 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import Author, Book, Genre
+
+TOP_GENRE_IDS_CACHE_KEY = 'top_genre_ids'
+CATALOG_FACETS_CACHE_KEY = 'catalog:facets'
+CATALOG_VERSION_CACHE_KEY = 'catalog:version'
+
+
+def top_genre_ids():
+    """Primary keys of the main (parentless) genres, cached since they rarely change"""
+    return cache.get_or_set(
+        TOP_GENRE_IDS_CACHE_KEY,
+        lambda: list(Genre.objects.filter(parent__isnull=True).values_list('pk', flat=True)),
+        600,
+    )
+
+
+def catalog_facets():
+    """Genre and author names offered by the catalog filters, cached until the catalog changes"""
+    def build():
+        # Only genres that have books are offered
+        genres = Genre.objects.filter(
+            Exists(Book.objects.filter(genre=OuterRef('pk')))
+        ).values_list('name', flat=True).order_by('name').distinct()
+        authors = Author.objects.values_list('name', flat=True).distinct()
+        return {'all_genres': list(genres), 'all_authors': list(authors)}
+
+    return cache.get_or_set(CATALOG_FACETS_CACHE_KEY, build, 60 * 60)
+
+
+def catalog_version():
+    """Token that changes whenever the catalog changes, used to key cached catalog pages"""
+    return cache.get_or_set(CATALOG_VERSION_CACHE_KEY, time.time_ns, None)
@@ -1,7 +1,11 @@
+import copy
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
-from .models import Reader, Genre
+from django.forms import modelform_factory
+from .catalog import top_genre_ids
+from .models import Author, Book, Reader, Genre
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -31,12 +35,6 @@ class UserRegistrationForm(UserCreationForm):
         model = User
         fields = ['username', 'email', 'first_name', 'last_name', 'password1', 'password2']
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field in self.fields:
-            if field not in ['date_of_birth', 'bio']:
-                self.fields[field].widget.attrs.update({'class': 'form-control'})
-
 
 class ReaderInterestsForm(forms.ModelForm):
     interests = forms.ModelMultipleChoiceField(
@@ -50,9 +48,98 @@ class ReaderInterestsForm(forms.ModelForm):
         model = Reader
         fields = ['interests', 'bio', 'date_of_birth']
 
-
-class CustomAuthenticationForm(AuthenticationForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['username'].widget.attrs.update({'class': 'form-control', 'placeholder': 'Username'})
-        self.fields['password'].widget.attrs.update({'class': 'form-control', 'placeholder': 'Password'})
+        self.fields['interests'].queryset = Genre.objects.filter(pk__in=top_genre_ids())
+
+
+class CustomAuthenticationForm(AuthenticationForm):
+    pass
+
+
+def set_widget_attrs(form_class, attrs_by_field):
+    """Bake widget attrs into a form class once, rather than in every __init__"""
+    for name, attrs in attrs_by_field.items():
+        # Copy first: inherited base_fields are shared with the parent form class
+        field = copy.deepcopy(form_class.base_fields[name])
+        field.widget.attrs.update(attrs)
+        form_class.base_fields[name] = field
+
+
+set_widget_attrs(UserRegistrationForm, {
+    'username': {'class': 'form-control'},
+    'password1': {'class': 'form-control'},
+    'password2': {'class': 'form-control'},
+})
+set_widget_attrs(CustomAuthenticationForm, {
+    'username': {'class': 'form-control', 'placeholder': 'Username'},
+    'password': {'class': 'form-control', 'placeholder': 'Password'},
+})
+
+
+# Admin dashboard forms are built once at import rather than on every request
+AdminBookEditForm = modelform_factory(
+    Book,
+    fields=[
+        'title', 'authors', 'publication_year', 'price',
+        'summary', 'cover_image', 'book_pdf', 'genre', 'book_type', 'stock'  # Added book_pdf
+    ],
+    labels={
+        'title': 'Book Title',
+        'authors': 'Authors',
+        'publication_year': 'Publication Year',
+        'price': 'Price (₹)',
+        'summary': 'Summary',
+        'cover_image': 'Cover Image URL',
+        'book_pdf': 'eBook PDF File',  # Added label
+        'genre': 'Genre',
+        'book_type': 'Book Type',
+        'stock': 'Stock Quantity'
+    },
+    help_texts={
+        'stock': 'Stock only applies to physical books',
+        'book_type': 'Digital books ignore stock quantity',
+        'cover_image': 'URL to book cover image',
+        'book_pdf': 'Upload PDF file for eBook version. Max 50MB.'  # Added help text
+    }
+)
+
+AdminBookAddForm = modelform_factory(
+    Book,
+    fields=[
+        'isbn', 'title', 'authors', 'publication_year', 'price',
+        'summary', 'cover_image', 'genre', 'book_type', 'stock'
+    ],
+    labels={
+        'isbn': 'ISBN *',
+        'title': 'Book Title *',
+        'authors': 'Authors *',
+        'publication_year': 'Publication Year *',
+        'price': 'Price (₹) *',
+        'summary': 'Summary',
+        'cover_image': 'Cover Image URL',
+        'genre': 'Genre',
+        'book_type': 'Book Type *',
+        'stock': 'Stock Quantity'
+    },
+    help_texts={
+        'isbn': 'Unique ISBN identifier for the book',
+        'stock': 'Stock only applies to physical books (default: 0)',
+        'book_type': 'Digital books ignore stock quantity',
+        'cover_image': 'URL to book cover image'
+    }
+)
+
+AdminAuthorForm = modelform_factory(
+    Author,
+    fields=['name', 'bio', 'photo'],
+    labels={
+        'name': 'Author Name *',
+        'bio': 'Biography',
+        'photo': 'Photo URL'
+    },
+    help_texts={
+        'photo': 'URL to author photo',
+        'bio': 'Brief biography of the author'
+    }
+)
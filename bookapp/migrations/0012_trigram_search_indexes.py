@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:10
+
+from django.db import migrations
+
+# Admin search uses icontains, which PostgreSQL compiles to
+# UPPER(col::text) LIKE UPPER(%s), so the trigram indexes are built on that
+# expression. Other backends have no trigram support and are skipped.
+TRIGRAM_INDEXES = [
+    ('book_title_trgm', 'bookapp_book', 'title'),
+    ('book_isbn_trgm', 'bookapp_book', 'isbn'),
+    ('author_name_trgm', 'bookapp_author', 'name'),
+    ('user_username_trgm', 'auth_user', 'username'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('bookapp', '0011_order_bookapp_ord_created_a8d343_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:08
+
+from django.db import migrations, models
+
+
+def populate_denormalized_fields(apps, schema_editor):
+    Author = apps.get_model('bookapp', 'Author')
+    Book = apps.get_model('bookapp', 'Book')
+    BookAuthor = Book.authors.through
+
+    names = {}
+    counts = {}
+    for book_id, author_id, name in BookAuthor.objects.order_by('pk').values_list('book_id', 'author_id', 'author__name'):
+        names.setdefault(book_id, []).append(name)
+        counts[author_id] = counts.get(author_id, 0) + 1
+    for book_id, book_names in names.items():
+        Book.objects.filter(pk=book_id).update(author_names=', '.join(book_names)[:500])
+    for author_id, count in counts.items():
+        Author.objects.filter(pk=author_id).update(book_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0012_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='book_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='author_names',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.RunPython(populate_denormalized_fields, migrations.RunPython.noop),
+    ]
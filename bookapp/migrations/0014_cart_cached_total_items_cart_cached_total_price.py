@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:12
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def populate_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('bookapp', 'Cart')
+    for cart in Cart.objects.all():
+        totals = cart.items.aggregate(
+            total_items=Sum('quantity'),
+            total_price=Sum(F('quantity') * F('book__price')),
+        )
+        cart.cached_total_items = totals['total_items'] or 0
+        cart.cached_total_price = totals['total_price'] or 0
+        cart.save(update_fields=['cached_total_items', 'cached_total_price'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0013_author_book_count_book_author_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='cached_total_items',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='cached_total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(populate_cart_totals, migrations.RunPython.noop),
+    ]
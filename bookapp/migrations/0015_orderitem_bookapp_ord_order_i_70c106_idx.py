@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0014_cart_cached_total_items_cart_cached_total_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'book_type', 'quantity'], name='bookapp_ord_order_i_70c106_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0015_orderitem_bookapp_ord_order_i_70c106_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_order_i_b32b33_idx',
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['order', '-created_at'], name='payments_order_i_cdec7b_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:18
+
+from django.db import migrations, models
+
+
+def populate_pdf_sizes(apps, schema_editor):
+    Book = apps.get_model('bookapp', 'Book')
+    for book in Book.objects.exclude(book_pdf__isnull=True).exclude(book_pdf=''):
+        try:
+            size = book.book_pdf.size
+        except OSError:
+            # Missing from storage; the size stays unknown
+            continue
+        Book.objects.filter(pk=book.pk).update(pdf_size_bytes=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0016_remove_payment_payments_order_i_b32b33_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pdf_size_bytes',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_pdf_sizes, migrations.RunPython.noop),
+    ]
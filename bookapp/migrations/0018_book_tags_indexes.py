@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:20
+
+from django.db import migrations
+
+# tags stays a JSONField so the SQLite setup keeps working; on PostgreSQL it is
+# jsonb, so a jsonb_path_ops GIN index serves tags__contains=[...] (@>) and a
+# trigram index serves the catalog's tags__icontains search. Other backends
+# are skipped.
+
+
+def create_tags_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS book_tags_gin ON bookapp_book USING gin (tags jsonb_path_ops)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS book_tags_trgm ON bookapp_book USING gin (UPPER(tags::text) gin_trgm_ops)'
+    )
+
+
+def drop_tags_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS book_tags_gin')
+    schema_editor.execute('DROP INDEX IF EXISTS book_tags_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0017_book_pdf_size_bytes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_tags_indexes, drop_tags_indexes),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0018_book_tags_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='bookapp_ord_updated_d7cb70_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0019_order_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['name'], name='bookapp_aut_name_bfaa14_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0020_author_name_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='bookapp_ord_created_a8d343_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'order_status', 'total_amount'], name='bookapp_ord_created_1efd89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'payment_status', 'total_amount'], name='bookapp_ord_created_133e2b_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-15 02:51
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_order_totals(apps, schema_editor):
+    Order = apps.get_model('bookapp', 'Order')
+    OrderItem = apps.get_model('bookapp', 'OrderItem')
+    total_items = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(total=Sum('quantity')).values('total')
+    Order.objects.update(cached_total_items=Coalesce(Subquery(total_items), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookapp', '0021_order_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='cached_total_items',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_order_totals, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,46 @@
+import logging
+import secrets
+import time
 from decimal import Decimal
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import DatabaseError, models
 from django.db.models import JSONField
-from datetime import datetime
 
-from django.db.models import F, Sum
+from django.db.models import Case, Count, Exists, ExpressionWrapper, F, OuterRef, Prefetch, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractYear
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+# Crockford base32: no I, L, O or U, so ids stay unambiguous when read aloud
+BASE32_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def time_ordered_id(length):
+    """Random base32 id whose first 10 characters encode the current time in milliseconds"""
+    random_bits = 5 * (length - 10)
+    value = (time.time_ns() // 1_000_000) << random_bits | secrets.randbits(random_bits)
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(BASE32_ALPHABET[index])
+    return ''.join(reversed(chars))
 
 
 class Author(models.Model):
     name = models.CharField(max_length=200)
     bio = models.TextField(blank=True)
     photo = models.URLField(blank=True, null=True)  # Changed from ImageField to URLField
+    # Denormalized, kept in sync by bookapp.signals
+    book_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Author pickers and listings are ordered by name
+            models.Index(fields=['name']),
+        ]
 
     def __str__(self):
         return self.name
@@ -44,22 +72,62 @@ class Genre(models.Model):
         return self.name
 
 
+class BookQuerySet(models.QuerySet):
+    LISTING_FIELDS = ['isbn', 'title', 'cover_image', 'summary', 'price', 'book_type', 'stock']
+
+    def for_listing(self):
+        """Only the columns a catalog card renders, with author names prefetched"""
+        return self.only(*self.LISTING_FIELDS).prefetch_related(
+            Prefetch('authors', queryset=Author.objects.only('id', 'name'))
+        )
+
+    def with_ebook_price(self):
+        """Annotate ebook_price, the discounted eBook price, computed in SQL"""
+        return self.annotate(ebook_price=ExpressionWrapper(
+            F('price') * Value(Book.EBOOK_PRICE_RATIO),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ))
+
+    def adjust_stock(self, deltas):
+        """Add each {isbn: delta} to those books' stock in a single UPDATE"""
+        if not deltas:
+            return 0
+        return self.filter(isbn__in=deltas).update(stock=F('stock') + Case(
+            *[When(isbn=isbn, then=Value(delta)) for isbn, delta in deltas.items()],
+            default=Value(0),
+            output_field=models.IntegerField(),
+        ))
+
+    def toggle_availability(self, restock=10):
+        """Flip physical books between out of stock and `restock` copies in a single UPDATE"""
+        return self.filter(book_type__in=['physical', 'both']).update(stock=Case(
+            When(stock__gt=0, then=Value(0)),
+            default=Value(restock),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Book(models.Model):
     BOOK_TYPES = [
         ('digital', 'Digital'),
         ('physical', 'Physical'),
         ('both', 'Both'),
     ]
+    # eBooks sell at 75% of the paperback price
+    EBOOK_PRICE_RATIO = Decimal('0.75')
 
     isbn = models.CharField(max_length=20, primary_key=True)
 
     title = models.CharField(max_length=300)
     authors = models.ManyToManyField(Author, related_name='books')
+    # Denormalized, kept in sync by bookapp.signals
+    author_names = models.CharField(max_length=500, blank=True, editable=False)
     publication_year = models.IntegerField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
     summary = models.TextField(blank=True)
     cover_image = models.URLField(blank=True)
     book_pdf = models.FileField(upload_to='book_pdfs/', null=True, blank=True)  # New PDF field
+    pdf_size_bytes = models.PositiveBigIntegerField(null=True, blank=True, editable=False)  # Recorded on upload
     tags = JSONField(default=list, blank=True)
     genre = models.ForeignKey(Genre, on_delete=models.SET_NULL, null=True, related_name='books')
     book_type = models.CharField(max_length=10, choices=BOOK_TYPES, default='both')
@@ -67,24 +135,39 @@ class Book(models.Model):
     created_at = models.DateTimeField(null=True, blank=True)
     updated_at = models.DateTimeField(null=True, blank=True)
 
+    objects = BookQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
-    @property
+    @cached_property
     def main_genre(self):
         if self.genre and self.genre.parent:
             return self.genre.parent
         return self.genre
 
     def save(self, *args, **kwargs):
-        # Auto-update timestamps
-        if not self.created_at:
-            self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        # Auto-update timestamps; a partial save only bumps updated_at when it is listed
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'updated_at' in update_fields:
+            now = timezone.now()
+            if not self.created_at:
+                self.created_at = now
+            self.updated_at = now
 
         # Auto-update book_type when PDF is added to digital-only book
         self._auto_update_book_type()
 
+        # Record the size of a new upload now, so size displays never ask the storage backend
+        if not self.book_pdf:
+            self.pdf_size_bytes = None
+        elif not self.book_pdf._committed:
+            self.pdf_size_bytes = self.book_pdf.size
+
+        # A partial save that touches the PDF also writes its recorded size
+        if update_fields is not None and 'book_pdf' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'pdf_size_bytes'}
+
         super().save(*args, **kwargs)
 
     def _auto_update_book_type(self):
@@ -116,8 +199,8 @@ class Book(models.Model):
     @property
     def pdf_file_size(self):
         """Get PDF file size in human-readable format"""
-        if self.book_pdf and self.book_pdf.size:
-            size = self.book_pdf.size
+        if self.book_pdf and self.pdf_size_bytes:
+            size = self.pdf_size_bytes
             if size < 1024:
                 return f"{size} B"
             elif size < 1024 * 1024:
@@ -136,6 +219,19 @@ class Book(models.Model):
         ordering = ['-publication_year', 'title']
 
 
+class ReaderQuerySet(models.QuerySet):
+    def with_age(self):
+        """Annotate current_age (whole years, NULL without a birth date) so it can be filtered and sorted in SQL"""
+        today = timezone.localdate()
+        birthday_not_reached = Q(date_of_birth__month__gt=today.month) | Q(
+            date_of_birth__month=today.month, date_of_birth__day__gt=today.day
+        )
+        return self.annotate(current_age=ExpressionWrapper(
+            today.year - ExtractYear('date_of_birth') - Case(When(birthday_not_reached, then=1), default=0),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Reader(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     date_of_birth = models.DateField(null=True, blank=True)
@@ -145,13 +241,15 @@ class Reader(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReaderQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
     @property
     def age(self):
         if self.date_of_birth:
-            today = datetime.today()
+            today = timezone.localdate()
             return today.year - self.date_of_birth.year - (
                     (today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day)
             )
@@ -162,23 +260,57 @@ class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized, kept in sync by bookapp.signals
+    cached_total_items = models.PositiveIntegerField(default=0, editable=False)
+    cached_total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+
+    # Session key holding an anonymous visitor's {isbn: quantity} until they log in
+    SESSION_KEY = 'cart'
 
     def __str__(self):
         return f"Cart of {self.user.username}"
 
+    @classmethod
+    def get_or_create_for(cls, user):
+        """Return the user's cart, reusing one loaded with the user and creating it race-free"""
+        try:
+            return user.cart
+        except cls.DoesNotExist:
+            cls.objects.bulk_create([cls(user=user)], ignore_conflicts=True)
+            user.cart = cls.objects.get(user=user)
+            return user.cart
+
     @property
     def total_items(self):
-        return self.items.aggregate(total=Sum('quantity'))['total'] or 0
+        return self.cached_total_items
 
     @property
     def total_price(self):
-        total = self.items.aggregate(
-            total=Sum(F('quantity') * F('book__price'))
-        )['total'] or 0
-        return total
+        return self.cached_total_price
 
     def clear(self):
-        self.items.all().delete()
+        from bookapp.signals import deferred_cart_totals
+
+        # Totals are refreshed once for the whole cart, not once per deleted item
+        with deferred_cart_totals(self.pk):
+            self.items.all().delete()
+
+
+class CartItemQuerySet(models.QuerySet):
+    def with_line_totals(self):
+        """Annotate line_total (quantity x current book price) in SQL"""
+        return self.annotate(line_total=ExpressionWrapper(
+            F('quantity') * F('book__price'), output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ))
+
+    def totals(self):
+        """Total quantity and price of these items as one aggregate query"""
+        return self.with_line_totals().aggregate(
+            total_items=Coalesce(Sum('quantity'), 0),
+            total_price=Coalesce(Sum('line_total'), Value(Decimal('0.00')),
+                                 output_field=models.DecimalField(max_digits=12, decimal_places=2)),
+        )
+
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
@@ -187,6 +319,8 @@ class CartItem(models.Model):
     book_type = models.CharField(max_length=10, choices=Book.BOOK_TYPES, default='physical')
     added_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.quantity} x {self.book.title}"
 
@@ -206,6 +340,16 @@ class Wishlist(models.Model):
     def __str__(self):
         return f"Wishlist of {self.user.username}"
 
+    @classmethod
+    def get_or_create_for(cls, user):
+        """Return the user's wishlist, reusing one loaded with the user and creating it race-free"""
+        try:
+            return user.wishlist
+        except cls.DoesNotExist:
+            cls.objects.bulk_create([cls(user=user)], ignore_conflicts=True)
+            user.wishlist = cls.objects.get(user=user)
+            return user.wishlist
+
     @property
     def total_items(self):
         return self.items.count()
@@ -222,6 +366,26 @@ class WishlistItem(models.Model):
         unique_together = ['wishlist', 'book']  # Prevent duplicate items
 
 
+class OrderQuerySet(models.QuerySet):
+    def with_summary(self):
+        """Annotate item_count, total_qty and has_physical for every order in one query"""
+        physical_items = OrderItem.objects.filter(order=OuterRef('pk'), book_type__in=['physical', 'both'])
+        return self.annotate(
+            item_count=Count('items'),
+            total_qty=Coalesce(Sum('items__quantity'), 0),
+            has_physical=Exists(physical_items),
+        )
+
+    LISTING_FIELDS = ['order_id', 'created_at', 'total_amount', 'order_status']
+
+    def for_listing(self):
+        """Only the columns an order history card renders, with its items and their books prefetched"""
+        items = OrderItem.objects.select_related('book').only(
+            'order', 'quantity', 'price', 'book_type', 'book__isbn', 'book__title', 'book__cover_image'
+        )
+        return self.only(*self.LISTING_FIELDS).prefetch_related(Prefetch('items', queryset=items))
+
+
 class Order(models.Model):
     ORDER_STATUS = [
         ('pending', 'Pending'),
@@ -268,6 +432,22 @@ class Order(models.Model):
     # Physical book
     has_physical_books = models.BooleanField(default=False)
 
+    # Denormalized, kept in sync by bookapp.signals
+    cached_total_items = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Dashboard breakdowns filter a created_at range and group by a status, summing total_amount;
+            # total_amount is a trailing key column since INCLUDE is PostgreSQL-only. Either index also
+            # serves plain created_at ranges, so no separate created_at index is kept
+            models.Index(fields=['created_at', 'order_status', 'total_amount']),
+            models.Index(fields=['created_at', 'payment_status', 'total_amount']),
+            # Serves the MAX(updated_at) that keys the cached admin dashboard
+            models.Index(fields=['updated_at']),
+        ]
+
     def __str__(self):
         return f"Order {self.order_id} - {self.user.username}"
 
@@ -275,25 +455,71 @@ class Order(models.Model):
         if not self.order_id:
             self.order_id = self.generate_order_id()
 
-        self.has_physical_books = any(
-            item.book.book_type in ['physical', 'both']
-            for item in self.items.all()
-        )
-
+        # has_physical_books is maintained where items change (populate_from_cart,
+        # update_has_physical_books), not recomputed on every status update
         super().save(*args, **kwargs)
 
     def generate_order_id(self):
-        import random
-        import string
-        return 'ORD' + ''.join(random.choices(string.digits, k=7))
+        # Time-ordered, so new keys append to the end of the primary key index
+        return 'ORD' + time_ordered_id(17)
 
+    # Read from cached_total_items, kept in sync by signals.refresh_order_totals
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.cached_total_items
 
-    @property
+    # Items are fixed once an order is placed, so this is computed once per instance
+    @cached_property
     def is_digital_only(self):
-        return all(item.book.book_type == 'digital' for item in self.items.all())
+        return not self.items.exclude(book_type='digital').exists()
+
+    def populate_from_cart(self, cart_items):
+        """Create this order's items from cart items (with books loaded) in a single INSERT"""
+        items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=self,
+                book=item.book,
+                quantity=item.quantity,
+                price=item.book.price,
+                book_type='physical' if item.book.book_type in ['physical', 'both'] else 'digital'
+            )
+            for item in cart_items
+        ])
+        self.has_physical_books = any(item.book_type == 'physical' for item in items)
+        # bulk_create sends no OrderItem signals, so the item total is written here too
+        self.cached_total_items = sum(item.quantity for item in items)
+        Order.objects.filter(pk=self.pk).update(
+            has_physical_books=self.has_physical_books,
+            cached_total_items=self.cached_total_items,
+        )
+        return items
+
+    def update_has_physical_books(self):
+        """Recompute has_physical_books after this order's items were edited"""
+        self.has_physical_books = self.physical_items.exists()
+        Order.objects.filter(pk=self.pk).update(has_physical_books=self.has_physical_books)
+
+    def physical_quantities(self):
+        """{isbn: total quantity} over this order's physical items"""
+        rows = self.physical_items.values('book_id').annotate(total=Sum('quantity')).values_list('book_id', 'total')
+        return dict(rows)
+
+    def deduct_stock(self):
+        """Take this order's physical quantities off book stock"""
+        quantities = self.physical_quantities()
+        Book.objects.adjust_stock({isbn: -quantity for isbn, quantity in quantities.items()})
+
+    def restore_stock(self):
+        """Put this order's physical quantities back on book stock"""
+        Book.objects.adjust_stock(self.physical_quantities())
+
+    def items_with_books(self):
+        """Order items with their books loaded in the same query"""
+        return list(self.items.select_related('book').with_line_totals())
+
+    def items_with_books_and_authors(self):
+        """Order items with their books, plus the books' authors in one extra query"""
+        return list(self.items.select_related('book').prefetch_related('book__authors').with_line_totals())
 
     @property
     def ebook_items(self):
@@ -308,7 +534,17 @@ class Order(models.Model):
     @property
     def latest_payment(self):
         """Get the latest payment for this order"""
-        return self.payments.order_by('-created_at').first()
+        return self.payments.only(
+            'id', 'payment_id', 'payment_status', 'amount', 'created_at'
+        ).order_by('-created_at').first()
+
+
+class OrderItemQuerySet(models.QuerySet):
+    def with_line_totals(self):
+        """Annotate line_total (quantity x price at time of order) in SQL"""
+        return self.annotate(line_total=ExpressionWrapper(
+            F('quantity') * F('price'), output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        ))
 
 
 class OrderItem(models.Model):
@@ -318,6 +554,13 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)  # Price at time of order
     book_type = models.CharField(max_length=10, choices=Book.BOOK_TYPES)  # Format chosen
 
+    objects = OrderItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'book_type', 'quantity']),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.book.title}"
 
@@ -328,6 +571,30 @@ class OrderItem(models.Model):
         return self.price * self.quantity
 
 
+class PaymentQuerySet(models.QuerySet):
+    def mark_completed(self):
+        """Mark every payment in the queryset completed with a single UPDATE"""
+        return self.update(payment_status='completed', updated_at=timezone.now())
+
+    def mark_failed(self):
+        """Mark every payment in the queryset failed with a single UPDATE"""
+        return self.update(payment_status='failed', updated_at=timezone.now())
+
+    def bulk_mark_completed(self, razorpay_details):
+        """
+        Complete several payments, each with its own gateway ids, in one batched UPDATE.
+        razorpay_details maps payment pk -> (razorpay_payment_id, razorpay_signature).
+        """
+        payments = list(self.filter(pk__in=razorpay_details))
+        now = timezone.now()
+        for payment in payments:
+            payment.payment_status = 'completed'
+            payment.razorpay_payment_id, payment.razorpay_signature = razorpay_details[payment.pk]
+            payment.updated_at = now
+        self.bulk_update(payments, ['payment_status', 'razorpay_payment_id', 'razorpay_signature', 'updated_at'])
+        return len(payments)
+
+
 class Payment(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -369,12 +636,14 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PaymentQuerySet.as_manager()
+
     class Meta:
         db_table = 'payments'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['payment_id']),
-            models.Index(fields=['order']),
+            models.Index(fields=['order', '-created_at']),
             models.Index(fields=['user']),
             models.Index(fields=['payment_status']),
             models.Index(fields=['created_at']),
@@ -388,7 +657,7 @@ class Payment(models.Model):
     def save(self, *args, **kwargs):
         # Auto-generate payment_id if not provided
         if not self.payment_id:
-            self.payment_id = f"pay_{timezone.now().strftime('%Y%m%d_%H%M%S')}_{self.user.id}"
+            self.payment_id = 'pay_' + time_ordered_id(26)
         super().save(*args, **kwargs)
 
     @property
@@ -420,24 +689,35 @@ class Payment(models.Model):
         if not self.can_refund:
             return False
 
-        refund_amount = amount or (self.amount - self.refund_amount)
-
-        if refund_amount <= 0:
-            return False
+        if amount:
+            if amount <= 0:
+                return False
+            refund_amount = Value(Decimal(str(amount)), output_field=models.DecimalField())
+        else:
+            refund_amount = F('amount') - F('refund_amount')
+        new_refund_total = F('refund_amount') + refund_amount
 
         try:
-            self.refund_amount += refund_amount
-            self.refund_reason = reason
-
-            if self.refund_amount >= self.amount:
-                self.payment_status = 'refunded'
-            else:
-                self.payment_status = 'partially_refunded'
-
-            self.refunded_at = timezone.now()
-            self.save()
-            return True
+            # One conditional UPDATE, so concurrent refunds cannot overwrite each other
+            # or push the refunded total past the payment amount
+            updated = Payment.objects.filter(
+                pk=self.pk, payment_status='completed', amount__gte=new_refund_total,
+            ).update(
+                refund_amount=new_refund_total,
+                refund_reason=reason,
+                payment_status=Case(
+                    When(amount__lte=new_refund_total, then=Value('refunded')),
+                    default=Value('partially_refunded'),
+                ),
+                refunded_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        except DatabaseError:
+            logger.exception('Refund update failed for payment %s', self.pk)
+            return False
 
-        except Exception as e:
-            # Handle refund failure
-            return False
\ No newline at end of file
+        if not updated:
+            return False
+        # The new status is decided in SQL, so read back the columns the UPDATE wrote
+        self.refresh_from_db(fields=['refund_amount', 'refund_reason', 'payment_status', 'refunded_at', 'updated_at'])
+        return True
\ No newline at end of file
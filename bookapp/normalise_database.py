@@ -1,71 +1,82 @@
 import random
 
-import pandas as pd
 import json
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from datetime import datetime
 
+from openpyxl import load_workbook
+
+# Currency symbols and thousands separators removed from price cells
+_PRICE_STRIP = str.maketrans('', '', '₹$,')
+
+# Spreadsheet columns the normaliser reads; any other column is never materialised
+TEXT_COLUMNS = ('Book title', 'Author', 'Genre', 'Sub genre', 'Tags', 'ISBN', 'Summary', 'Image URL')
+BOOK_COLUMNS = TEXT_COLUMNS + ('Year', 'Price')
+
+# A cleaned spreadsheet row; fields follow BOOK_COLUMNS order
+CleanedBook = namedtuple(
+    'CleanedBook',
+    ['title', 'author', 'genre', 'sub_genre', 'tags', 'isbn', 'summary', 'image_url', 'year', 'price'],
+)
+
+# Weighted pool the generated fixtures draw initial stock levels from
+_STOCK_POOL = (0, 0, 5, 10, 10, 15, 20, 25, 30, 40, 50)
+
 
 def read_excel_data(excel_file_path, sheet_name=0):
-    """Read book data from Excel file"""
+    """Stream book rows from an Excel file as dicts, without loading the whole workbook"""
     try:
-        df = pd.read_excel(excel_file_path, sheet_name=sheet_name)
-        print(f"Successfully read Excel with {len(df)} rows and columns: {list(df.columns)}")
-        return df.to_dict('records')
+        workbook = load_workbook(excel_file_path, read_only=True, data_only=True)
     except Exception as e:
         print(f"Excel reading failed: {e}")
-        return []
+        return
 
+    try:
+        sheet = workbook[sheet_name] if isinstance(sheet_name, str) else workbook.worksheets[sheet_name]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+        if header is None:
+            return
+        print(f"Reading Excel with columns: {list(header)}")
+
+        # Only pull the cells of the columns used downstream
+        columns = [(index, column) for index, column in enumerate(header) if column in BOOK_COLUMNS]
+        if not columns:
+            return
+        max_col = columns[-1][0] + 1
+        for row in sheet.iter_rows(min_row=2, max_col=max_col, values_only=True):
+            # Leave empty cells out so the cleaners fall back to their defaults
+            yield {column: row[index] for index, column in columns if row[index] is not None}
+    finally:
+        workbook.close()
 
-def clean_book_data(books_data):
-    """Clean and convert data types"""
-    cleaned_data = []
 
+def clean_book_data(books_data):
+    """Clean and convert data types, yielding one cleaned book at a time"""
     for book in books_data:
-        cleaned_book = {}
-
         # Text fields
-        cleaned_book['Book title'] = str(book.get('Book title', '')).strip()
-        cleaned_book['Author'] = str(book.get('Author', '')).strip()
-        cleaned_book['Genre'] = str(book.get('Genre', '')).strip()
-        cleaned_book['Sub genre'] = str(book.get('Sub genre', '')).strip()
-        cleaned_book['Tags'] = str(book.get('Tags', '')).strip()
-        cleaned_book['ISBN'] = str(book.get('ISBN', '')).strip()
-        cleaned_book['Summary'] = str(book.get('Summary', '')).strip()
-        cleaned_book['Image URL'] = str(book.get('Image URL', '')).strip()
+        text_fields = [str(book.get(column, '')).strip() for column in TEXT_COLUMNS]
 
         # Numeric fields with conversion
         try:
-            cleaned_book['Year'] = int(book.get('Year', 0))
+            year = int(book.get('Year', 0))
         except (ValueError, TypeError):
-            cleaned_book['Year'] = 0
+            year = 0
 
         try:
-            price_str = str(book.get('Price', 0)).replace('₹', '').replace('$', '').replace(',', '').strip()
-            cleaned_book['Price'] = float(price_str)
+            # Numeric cells already come back as numbers; only text needs stripping
+            price = book.get('Price', 0)
+            if isinstance(price, str):
+                price = price.translate(_PRICE_STRIP).strip()
+            price = float(price)
         except (ValueError, TypeError):
-            cleaned_book['Price'] = 0.0
+            price = 0.0
 
-        cleaned_data.append(cleaned_book)
-
-    return cleaned_data
+        yield CleanedBook(*text_fields, year, price)
 
 
 def normalize_book_data_from_excel(excel_file_path, sheet_name=0):
     """Normalize book data from Excel file with proper genre hierarchy"""
 
-    # Read data from Excel
-    raw_data = read_excel_data(excel_file_path, sheet_name)
-
-    if not raw_data:
-        print("No data found in Excel file!")
-        return None
-
-    # Clean the data
-    cleaned_data = clean_book_data(raw_data)
-
-    print(f"Processing {len(cleaned_data)} books...")
-
     # Initialize storage for normalized data
     normalized = {
         'authors': defaultdict(dict),
@@ -76,92 +87,95 @@ def normalize_book_data_from_excel(excel_file_path, sheet_name=0):
 
     # Track unique values
     author_name_to_id = {}
-    genre_hierarchy = defaultdict(set)  # {main_genre: set(subgenres)}
-    genre_name_to_id = {}
-
-    # Counters for IDs
-    author_id = 1
-    genre_id = 1
-
-    # First pass: Collect all unique genres and their subgenres
-    print("Analyzing genre hierarchy...")
-    for book_data in cleaned_data:
-        main_genre = book_data.get('Genre', 'Unknown Genre').strip()
-        sub_genre = book_data.get('Sub genre', 'General').strip()
-
-        if main_genre and sub_genre:
-            genre_hierarchy[main_genre].add(sub_genre)
-
-    # Create genre mapping with proper hierarchy
-    print("\nGenre Hierarchy Found:")
-    for main_genre, subgenres in genre_hierarchy.items():
-        print(f"  {main_genre}:")
-        for subgenre in subgenres:
-            print(f"    - {subgenre}")
-
-    # Create main genres first (parent = None)
-    for main_genre in genre_hierarchy.keys():
-        if main_genre not in genre_name_to_id:
-            normalized['genres'][genre_id] = {
-                'id': genre_id,
-                'name': main_genre,
-                'parent_id': None,
-                'is_main_genre': True
-            }
-            genre_name_to_id[main_genre] = genre_id
-            genre_id += 1
+    genre_pairs = {}  # {(main_genre, subgenre): None}, a set that keeps first-seen order
 
-    # Create subgenres with correct parent relationships
-    for main_genre, subgenres in genre_hierarchy.items():
-        parent_id = genre_name_to_id[main_genre]
-        for subgenre in subgenres:
-            subgenre_key = f"{main_genre}_{subgenre}"
-            if subgenre_key not in genre_name_to_id:
-                normalized['genres'][genre_id] = {
-                    'id': genre_id,
-                    'name': subgenre,
-                    'parent_id': parent_id,
-                    'is_main_genre': False
-                }
-                genre_name_to_id[subgenre_key] = genre_id
-                genre_id += 1
-
-    # Second pass: Process books and authors
+    # Single streaming pass over the sheet: collect the genre hierarchy from every row
+    # and keep only the books that will be imported
+    print("Reading books and analyzing genre hierarchy...")
+    row_count = 0
+    valid_books = []
     used_isbns = set()
 
-    for book_data in cleaned_data:
+    for book_data in clean_book_data(read_excel_data(excel_file_path, sheet_name)):
+        row_count += 1
+        if book_data.genre and book_data.sub_genre:
+            genre_pairs[book_data.genre, book_data.sub_genre] = None
+
         # Skip if essential data is missing
-        if not book_data.get('Book title') or not book_data.get('Author'):
-            print(f"Skipping book with missing title or author: {book_data.get('Book title', 'Unknown')}")
+        if not book_data.title or not book_data.author:
+            print(f"Skipping book with missing title or author: {book_data.title}")
             continue
 
         # Check for valid ISBN
-        isbn = book_data.get('ISBN', '').strip()
+        isbn = book_data.isbn
         if not isbn:
-            print(f"Skipping book with missing ISBN: {book_data['Book title']}")
+            print(f"Skipping book with missing ISBN: {book_data.title}")
             continue
 
         # Check for duplicate ISBN
         if isbn in used_isbns:
-            print(f"Skipping duplicate ISBN: {isbn} - {book_data['Book title']}")
+            print(f"Skipping duplicate ISBN: {isbn} - {book_data.title}")
             continue
 
         used_isbns.add(isbn)
+        valid_books.append(book_data)
+
+    if not row_count:
+        print("No data found in Excel file!")
+        return None
+
+    print(f"Processed {row_count} rows, {len(valid_books)} books to import")
+
+    # Group the distinct pairs once: {main_genre: set(subgenres)}
+    genre_hierarchy = defaultdict(set)
+    for main_genre, sub_genre in genre_pairs:
+        genre_hierarchy[main_genre].add(sub_genre)
+
+    # Create genre mapping with proper hierarchy
+    print("\nGenre Hierarchy Found:")
+    for main_genre, subgenres in genre_hierarchy.items():
+        print(f"  {main_genre}:")
+        for subgenre in subgenres:
+            print(f"    - {subgenre}")
+
+    # Number main genres first (parent = None), then subgenres under their parents
+    genre_name_to_id = {main_genre: i for i, main_genre in enumerate(genre_hierarchy, start=1)}
+    normalized['genres'].update({
+        genre_id: {'id': genre_id, 'name': main_genre, 'parent_id': None, 'is_main_genre': True}
+        for main_genre, genre_id in genre_name_to_id.items()
+    })
+
+    subgenre_rows = [
+        (f"{main_genre}_{subgenre}", subgenre, genre_name_to_id[main_genre])
+        for main_genre, subgenres in genre_hierarchy.items()
+        for subgenre in subgenres
+    ]
+    for genre_id, (subgenre_key, subgenre, parent_id) in enumerate(subgenre_rows, start=len(genre_name_to_id) + 1):
+        normalized['genres'][genre_id] = {
+            'id': genre_id,
+            'name': subgenre,
+            'parent_id': parent_id,
+            'is_main_genre': False
+        }
+        genre_name_to_id[subgenre_key] = genre_id
+
+    # Process the validated books and their authors
+    for book_data in valid_books:
+        isbn = book_data.isbn
 
         # Process Author
-        author_name = book_data['Author']
+        author_name = book_data.author
         if author_name not in author_name_to_id:
+            author_id = author_name_to_id[author_name] = len(author_name_to_id) + 1
             normalized['authors'][author_id] = {
                 'id': author_id,
                 'name': author_name,
-                'bio': f"Author of {book_data['Book title']}"
+                'bio': f"Author of {book_data.title}"
             }
-            author_name_to_id[author_name] = author_id
-            author_id += 1
 
         # Process Genre and Subgenre - Find correct genre ID
-        main_genre = book_data.get('Genre', 'Unknown Genre').strip()
-        sub_genre = book_data.get('Sub genre', 'General').strip()
+        main_genre = book_data.genre
+        sub_genre = book_data.sub_genre
 
         # Find the correct genre ID for this book's subgenre
         subgenre_key = f"{main_genre}_{sub_genre}"
@@ -173,7 +187,7 @@ def normalize_book_data_from_excel(excel_file_path, sheet_name=0):
             genre_id_for_book = genre_name_to_id.get(main_genre, 1)  # Default to first genre
 
         # Process Tags (convert to list)
-        tags_text = book_data.get('Tags', '')
+        tags_text = book_data.tags
         if tags_text:
             tags_list = [tag.strip() for tag in tags_text.split(',')]
         else:
@@ -182,11 +196,11 @@ def normalize_book_data_from_excel(excel_file_path, sheet_name=0):
         # Add Book
         normalized['books'].append({
             'isbn': isbn,
-            'title': book_data['Book title'],
-            'publication_year': book_data['Year'],
-            'price': book_data['Price'],
-            'summary': book_data.get('Summary', ''),
-            'cover_image': book_data.get('Image URL', ''),
+            'title': book_data.title,
+            'publication_year': book_data.year,
+            'price': book_data.price,
+            'summary': book_data.summary,
+            'cover_image': book_data.image_url,
             'tags': tags_list,
             'genre_id': genre_id_for_book  # Changed from subgenre_id to genre_id
         })
@@ -281,52 +295,57 @@ class Book(models.Model):
 
 
 def generate_fixtures(normalized_data):
-    """Generate Django fixtures from normalized data"""
+    """Generate Django fixtures from normalized data, lazily per model"""
+    current_time = datetime.now().isoformat()
 
-    fixtures = {
-        'authors': [],
-        'genres': [],
-        'books': []
+    return {
+        'authors': _author_fixtures(normalized_data),
+        'genres': _genre_fixtures(normalized_data),
+        'books': _book_fixtures(normalized_data, current_time),
     }
 
-    current_time = datetime.now().isoformat()
 
-    # Authors fixtures
-    for author_id, author_data in normalized_data['authors'].items():
-        fixtures['authors'].append({
+def _author_fixtures(normalized_data):
+    for author_data in normalized_data['authors'].values():
+        yield {
             'model': 'bookapp.author',
             'pk': author_data['id'],
             'fields': {
                 'name': author_data['name'],
                 'bio': author_data.get('bio', ''),
             }
-        })
+        }
+
 
-    # Genres fixtures - both main genres and subgenres
-    for genre_id, genre_data in normalized_data['genres'].items():
-        fixtures['genres'].append({
+def _genre_fixtures(normalized_data):
+    # Both main genres and subgenres
+    for genre_data in normalized_data['genres'].values():
+        yield {
             'model': 'bookapp.genre',
             'pk': genre_data['id'],
             'fields': {
                 'name': genre_data['name'],
                 'parent': genre_data['parent_id'],
             }
-        })
+        }
+
 
-    # Books fixtures
-    for book_data in normalized_data['books']:
-        # Get author IDs for this book
-        author_ids = []
-        for ba in normalized_data['book_authors']:
-            if ba['book_isbn'] == book_data['isbn']:
-                author_ids.append(ba['author_id'])
+def _book_fixtures(normalized_data, current_time):
+    # Index book-author relationships once instead of scanning them per book
+    isbn_to_authors = defaultdict(list)
+    for ba in normalized_data['book_authors']:
+        isbn_to_authors[ba['book_isbn']].append(ba['author_id'])
 
-        fixtures['books'].append({
+    books = normalized_data['books']
+    stocks = random.choices(_STOCK_POOL, k=len(books))
+
+    for book_data, stock in zip(books, stocks):
+        yield {
             'model': 'bookapp.book',
             'pk': book_data['isbn'],
             'fields': {
                 'title': book_data['title'],
-                'authors': author_ids,
+                'authors': isbn_to_authors[book_data['isbn']],
                 'publication_year': book_data['publication_year'],
                 'price': str(book_data['price']),
                 'summary': book_data['summary'],
@@ -334,13 +353,21 @@ def generate_fixtures(normalized_data):
                 'tags': book_data['tags'],
                 'genre': book_data['genre_id'],  # Changed from subgenre to genre
                 'book_type': 'both',
-                'stock': random.choice([0, 0, 5, 10, 10, 15, 20, 25, 30, 40, 50]),
+                'stock': stock,
                 'created_at': current_time,
                 'updated_at': current_time,
             }
-        })
+        }
 
-    return fixtures
+
+def write_fixture(path, entries):
+    """Stream fixture entries into a JSON array file, one object per line"""
+    with open(path, 'wb') as f:
+        f.write(b'[')
+        for i, entry in enumerate(entries):
+            f.write(b',\n' if i else b'\n')
+            f.write(json.dumps(entry, ensure_ascii=False).encode())
+        f.write(b'\n]\n')
 
 
 def main():
@@ -365,15 +392,10 @@ def main():
     with open('models.py', 'w') as f:
         f.write(models_code)
 
-    # Save fixtures to JSON files
-    with open('authors_fixture.json', 'w') as f:
-        json.dump(fixtures['authors'], f, indent=2)
-
-    with open('genres_fixture.json', 'w') as f:
-        json.dump(fixtures['genres'], f, indent=2)
-
-    with open('books_fixture.json', 'w') as f:
-        json.dump(fixtures['books'], f, indent=2)
+    # Stream fixtures to JSON files
+    write_fixture('authors_fixture.json', fixtures['authors'])
+    write_fixture('genres_fixture.json', fixtures['genres'])
+    write_fixture('books_fixture.json', fixtures['books'])
 
     # Print summary
     print("\n" + "=" * 50)
@@ -398,8 +420,11 @@ def main():
 
     # Show sample data with correct genre hierarchy
     print("\nSample Books with Genre Hierarchy:")
+    isbn_to_author = {}
+    for ba in normalized_data['book_authors']:
+        isbn_to_author.setdefault(ba['book_isbn'], ba['author_id'])
     for book in normalized_data['books'][:3]:
-        author_id = next(ba['author_id'] for ba in normalized_data['book_authors'] if ba['book_isbn'] == book['isbn'])
+        author_id = isbn_to_author[book['isbn']]
         author_name = normalized_data['authors'][author_id]['name']
 
         genre_data = normalized_data['genres'][book['genre_id']]
@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .catalog import CATALOG_FACETS_CACHE_KEY, CATALOG_VERSION_CACHE_KEY, TOP_GENRE_IDS_CACHE_KEY
+from .models import Author, Book, Cart, CartItem, Genre, Order, OrderItem
+
+BookAuthor = Book.authors.through
+
+# Carts whose totals are refreshed once by deferred_cart_totals rather than per item
+_deferred_cart_pks = ContextVar('deferred_cart_pks', default=frozenset())
+
+
+def refresh_author_names(book_pks):
+    """Rebuild the denormalized Book.author_names column for the given books"""
+    names = {pk: [] for pk in book_pks}
+    rows = BookAuthor.objects.filter(book_id__in=names).order_by('pk').values_list('book_id', 'author__name')
+    for book_id, name in rows:
+        names[book_id].append(name)
+    max_length = Book._meta.get_field('author_names').max_length
+    now = timezone.now()
+    for book_id, book_names in names.items():
+        # Bumping updated_at also invalidates the book's cached PDFs
+        Book.objects.filter(pk=book_id).update(author_names=', '.join(book_names)[:max_length], updated_at=now)
+
+
+def refresh_book_counts(author_pks):
+    """Rebuild the denormalized Author.book_count column for the given authors"""
+    counts = BookAuthor.objects.filter(author_id=OuterRef('pk')).values('author_id').annotate(n=Count('pk')).values('n')
+    Author.objects.filter(pk__in=author_pks).update(book_count=Coalesce(Subquery(counts), 0))
+
+
+def refresh_cart_totals(cart_pks):
+    """Rebuild the denormalized Cart.cached_total_items / cached_total_price columns"""
+    items = CartItem.objects.filter(cart=OuterRef('pk')).values('cart')
+    total_items = items.annotate(total=Sum('quantity')).values('total')
+    total_price = items.annotate(total=Sum(F('quantity') * F('book__price'))).values('total')
+    Cart.objects.filter(pk__in=cart_pks).update(
+        cached_total_items=Coalesce(Subquery(total_items), 0),
+        cached_total_price=Coalesce(Subquery(total_price), Value(0), output_field=DecimalField()),
+    )
+
+
+def refresh_order_totals(order_pks):
+    """Rebuild the denormalized Order.cached_total_items column for the given orders"""
+    total_items = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(total=Sum('quantity')).values('total')
+    Order.objects.filter(pk__in=order_pks).update(cached_total_items=Coalesce(Subquery(total_items), 0))
+
+
+def merge_cart_quantities(cart, quantities):
+    """Add {isbn: quantity} to a cart, bumping existing items in one UPDATE and bulk-inserting the rest"""
+    existing = set(cart.items.filter(book_id__in=quantities).values_list('book_id', flat=True))
+    if existing:
+        cart.items.filter(book_id__in=existing).update(quantity=F('quantity') + Case(
+            *[When(book_id=isbn, then=Value(quantities[isbn])) for isbn in existing],
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    # Books may have gone or turned digital-only since they were added
+    new_isbns = Book.objects.filter(isbn__in=set(quantities) - existing).exclude(book_type='digital').values_list('isbn', flat=True)
+    CartItem.objects.bulk_create([
+        CartItem(cart=cart, book_id=isbn, book_type='physical', quantity=quantities[isbn]) for isbn in new_isbns
+    ])
+    # Neither the update nor bulk_create sends CartItem signals
+    refresh_cart_totals([cart.pk])
+
+
+@receiver(m2m_changed, sender=BookAuthor)
+def book_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The cleared side is gone by post_clear, so remember it now
+        related = instance.books if reverse else instance.authors
+        instance._cleared_pks = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_pks', set())
+    elif action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        refresh_author_names(pk_set)
+        refresh_book_counts([instance.pk])
+    else:
+        refresh_author_names([instance.pk])
+        refresh_book_counts(pk_set)
+
+
+@receiver(pre_delete, sender=Book)
+def remember_book_authors(sender, instance, **kwargs):
+    instance._author_pks = list(instance.authors.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Book)
+def update_counts_after_book_delete(sender, instance, **kwargs):
+    refresh_book_counts(getattr(instance, '_author_pks', []))
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    instance._book_pks = list(instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def update_names_after_author_delete(sender, instance, **kwargs):
+    refresh_author_names(getattr(instance, '_book_pks', []))
+
+
+@receiver(post_save, sender=Author)
+def update_names_after_author_save(sender, instance, created, update_fields, **kwargs):
+    # Only a rename changes the books' author_names
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    refresh_author_names(instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_top_genre_ids(sender, **kwargs):
+    cache.delete(TOP_GENRE_IDS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(m2m_changed, sender=BookAuthor)
+def invalidate_catalog_cache(sender, **kwargs):
+    # A new version token makes every cached catalog page miss
+    cache.delete_many([CATALOG_FACETS_CACHE_KEY, CATALOG_VERSION_CACHE_KEY])
+
+
+@contextmanager
+def deferred_cart_totals(cart_pk):
+    """Skip the per-item cart totals refresh inside the block and refresh once on exit"""
+    token = _deferred_cart_pks.set(_deferred_cart_pks.get() | {cart_pk})
+    try:
+        yield
+    finally:
+        _deferred_cart_pks.reset(token)
+        refresh_cart_totals([cart_pk])
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def update_cart_totals(sender, instance, **kwargs):
+    if instance.cart_id not in _deferred_cart_pks.get():
+        refresh_cart_totals([instance.cart_id])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_totals(sender, instance, **kwargs):
+    refresh_order_totals([instance.order_id])
+
+
+@receiver(post_save, sender=Book)
+def update_cart_totals_after_book_save(sender, instance, created, update_fields, **kwargs):
+    # A price change alters the total of every cart holding the book
+    if created or (update_fields and 'price' not in update_fields):
+        return
+    refresh_cart_totals(CartItem.objects.filter(book=instance).values('cart'))
+
+
+@receiver(user_logged_in)
+def merge_session_cart(sender, request, user, **kwargs):
+    quantities = request.session.pop(Cart.SESSION_KEY, None) if request is not None else None
+    if quantities:
+        merge_cart_quantities(Cart.get_or_create_for(user), quantities)
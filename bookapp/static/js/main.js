@@ -105,6 +105,16 @@ function initializeWishlistHeart(heart) {
 }
 
 function checkWishlistStates() {
+    // Pages that render the wishlisted ISBNs inline need no status request
+    const inlineStatus = document.getElementById('wishlisted-isbns');
+    if (inlineStatus) {
+        const wishlisted = new Set(JSON.parse(inlineStatus.textContent));
+        document.querySelectorAll('.wishlist-heart').forEach(heart => {
+            updateWishlistHeart(heart, wishlisted.has(heart.dataset.bookIsbn));
+        });
+        return Promise.resolve();
+    }
+
     // Check server for wishlist status of all books on page
     const bookIsbns = Array.from(document.querySelectorAll('.wishlist-heart'))
         .map(heart => heart.dataset.bookIsbn)
@@ -1,6 +1,74 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
 
+# Patterns are grouped by prefix so the resolver can skip a whole group on a prefix mismatch
+
+# eBook URLs
+ebook_patterns = [
+    path('purchase/<str:isbn>/', views.purchase_ebook, name='purchase_ebook'),
+    path('preview/<str:isbn>/', views.preview_ebook, name='preview_ebook'),
+    path('<str:order_id>/payment/', views.ebook_payment_gateway, name='ebook_payment_gateway'),
+    path('payment/success/', views.handle_ebook_payment_success, name='ebook_payment_success'),
+    path('<str:order_id>/download/', views.download_ebook_file, name='download_ebook_file'),
+]
+
+# Cart URLs
+cart_patterns = [
+    path('', views.cart_detail, name='cart_detail'),
+    path('add/<str:isbn>/', views.add_to_cart, name='add_to_cart'),
+    path('remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('update/<int:item_id>/', views.update_cart_quantity, name='update_cart_quantity'),
+    path('clear/', views.clear_cart, name='clear_cart'),
+]
+
+# Wishlist URLs
+wishlist_patterns = [
+    path('', views.wishlist_detail, name='wishlist_detail'),
+    path('add/<str:isbn>/', views.add_to_wishlist, name='add_to_wishlist'),
+    path('remove/<int:item_id>/', views.remove_from_wishlist, name='remove_from_wishlist'),
+    path('move-to-cart/<int:item_id>/', views.move_to_cart, name='move_to_cart'),
+    path('clear/', views.clear_wishlist, name='clear_wishlist'),
+    path('toggle-ajax/<str:isbn>/', views.toggle_wishlist_ajax, name='toggle_wishlist_ajax'),
+    path('check-status/', views.check_wishlist_status, name='check_wishlist_status'),
+]
+
+# Order URLs
+order_patterns = [
+    path('create/', views.create_order, name='create_order'),
+    path('<str:order_id>/cancel/', views.cancel_order, name='cancel_order'),
+    # Generic patterns last
+    path('<str:order_id>/', views.order_detail, name='order_detail'),
+    path('', views.order_list, name='order_list'),
+]
+
+# Order payment URLs
+order_payment_patterns = [
+    path('<str:order_id>/payment/', views.order_payment_gateway, name='order_payment_gateway'),
+    path('payment/success/', views.order_payment_success, name='order_payment_success'),
+    path('payment/failed/', views.order_payment_failed, name='order_payment_failed'),
+    path('<str:order_id>/payment/cancel/', views.cancel_payment, name='cancel_payment'),
+]
+
+# Author Related URLs
+author_patterns = [
+    path('', views.author_list, name='author_list'),
+    path('<int:author_id>/', views.author_detail, name='author_detail'),
+]
+
+# Admin URLs
+admin_book_patterns = [
+    path('add/', views.admin_book_add, name='admin_book_add'),
+    path('<str:isbn>/', views.admin_book_detail, name='admin_book_detail'),
+    path('', views.admin_book_management, name='admin_book_management'),
+]
+
+# Admin author management
+admin_author_patterns = [
+    path('add/', views.admin_author_add, name='admin_author_add'),
+    path('<int:author_id>/', views.admin_author_detail, name='admin_author_detail'),
+    path('', views.admin_author_management, name='admin_author_management'),
+]
+
 urlpatterns = [
     # Core pages
     path('', views.home, name='home'),
@@ -17,61 +85,18 @@ urlpatterns = [
     path('book/<str:isbn>/', views.book_detail, name='book_detail'),
 
 
-    # eBook URLs
-    path('ebook/purchase/<str:isbn>/', views.purchase_ebook, name='purchase_ebook'),
-    path('ebook/preview/<str:isbn>/', views.preview_ebook, name='preview_ebook'),
-
-
-    # Cart URLs
-    path('cart/', views.cart_detail, name='cart_detail'),
-    path('cart/add/<str:isbn>/', views.add_to_cart, name='add_to_cart'),
-    path('cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
-    path('cart/update/<int:item_id>/', views.update_cart_quantity, name='update_cart_quantity'),
-    path('cart/clear/', views.clear_cart, name='clear_cart'),
-
-
-    # Wishlist URLs
-    path('wishlist/', views.wishlist_detail, name='wishlist_detail'),
-    path('wishlist/add/<str:isbn>/', views.add_to_wishlist, name='add_to_wishlist'),
-    path('wishlist/remove/<int:item_id>/', views.remove_from_wishlist, name='remove_from_wishlist'),
-    path('wishlist/move-to-cart/<int:item_id>/', views.move_to_cart, name='move_to_cart'),
-    path('wishlist/clear/', views.clear_wishlist, name='clear_wishlist'),
-    path('wishlist/toggle-ajax/<str:isbn>/', views.toggle_wishlist_ajax, name='toggle_wishlist_ajax'),
-    path('wishlist/check-status/', views.check_wishlist_status, name='check_wishlist_status'),
-
-
-    # Order URLs
-    path('orders/create/', views.create_order, name='create_order'),
-    path('orders/<str:order_id>/cancel/', views.cancel_order, name='cancel_order'),
-    # Generic patterns last
-    path('orders/<str:order_id>/', views.order_detail, name='order_detail'),
-    path('order/<str:order_id>/payment/', views.order_payment_gateway, name='order_payment_gateway'),
-    path('order/payment/success/', views.order_payment_success, name='order_payment_success'),
-    path('order/payment/failed/', views.order_payment_failed, name='order_payment_failed'),
-    path('order/<str:order_id>/payment/cancel/', views.cancel_payment, name='cancel_payment'),
-    path('orders/', views.order_list, name='order_list'),
-    path('ebook/<str:order_id>/payment/', views.ebook_payment_gateway, name='ebook_payment_gateway'),
-    path('ebook/payment/success/', views.handle_ebook_payment_success, name='ebook_payment_success'),
-    path('ebook/<str:order_id>/download/', views.download_ebook_file, name='download_ebook_file'),
-
-
-    # Author Related URLs
-    path('authors/', views.author_list, name='author_list'),
-    path('authors/<int:author_id>/', views.author_detail, name='author_detail'),
+    path('ebook/', include(ebook_patterns)),
+    path('cart/', include(cart_patterns)),
+    path('wishlist/', include(wishlist_patterns)),
+    path('orders/', include(order_patterns)),
+    path('order/', include(order_payment_patterns)),
+    path('authors/', include(author_patterns)),
 
     # New arrivals
     path('new-arrivals/', views.new_arrivals, name='new_arrivals'),
 
 
-    # Admin URLs
-    path('admin-books/add/', views.admin_book_add, name='admin_book_add'),
-    path('admin-books/<str:isbn>/', views.admin_book_detail, name='admin_book_detail'),
-    path('admin-books/', views.admin_book_management, name='admin_book_management'),
-
-
-    # Admin author management
-    path('admin-authors/add/', views.admin_author_add, name='admin_author_add'),
-    path('admin-authors/<int:author_id>/', views.admin_author_detail, name='admin_author_detail'),
-    path('admin-authors/', views.admin_author_management, name='admin_author_management'),
+    path('admin-books/', include(admin_book_patterns)),
+    path('admin-authors/', include(admin_author_patterns)),
     path('admin-dash/', views.admin_order_dashboard, name='admin_order_dashboard'),
 ]
\ No newline at end of file
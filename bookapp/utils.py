@@ -1,110 +1,172 @@
 from io import BytesIO
+from string import Template
 from xhtml2pdf import pisa
+from django.core.cache import cache
 from django.utils import timezone
 
-
-def generate_ebook_pdf(book):
-    """Generate a dynamic PDF for the eBook"""
-
-    # HTML content for the PDF
-    html_content = f"""
+PDF_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Static stylesheets, kept out of the per-book templates
+_EBOOK_CSS = """
+body {
+    font-family: 'Georgia', serif;
+    line-height: 1.6;
+    color: #333;
+}
+
+.cover-page {
+    page-break-after: always;
+    text-align: center;
+    padding-top: 8cm;
+}
+
+.book-title {
+    font-family: 'Times New Roman', serif;
+    font-size: 28pt;
+    font-weight: bold;
+    margin-bottom: 2cm;
+    line-height: 1.3;
+    color: #2c1810;
+}
+
+.book-author {
+    font-family: 'Times New Roman', serif;
+    font-size: 18pt;
+    font-style: italic;
+    color: #666;
+    margin-bottom: 4cm;
+}
+
+.publisher {
+    font-size: 12pt;
+    color: #888;
+    margin-top: 3cm;
+}
+
+.content-page {
+    page-break-after: always;
+    padding-top: 3cm;
+}
+
+.chapter-title {
+    font-size: 20pt;
+    font-weight: bold;
+    text-align: center;
+    margin-bottom: 2cm;
+    color: #2c1810;
+}
+
+.content {
+    font-size: 12pt;
+    text-align: justify;
+}
+
+.notice {
+    background-color: #f8f9fa;
+    border-left: 4px solid #8B4513;
+    padding: 20px;
+    margin: 20px 0;
+    font-style: italic;
+}
+
+.copyright {
+    position: fixed;
+    bottom: 2cm;
+    left: 2cm;
+    right: 2cm;
+    text-align: center;
+    font-size: 10pt;
+    color: #666;
+    border-top: 1px solid #ddd;
+    padding-top: 10px;
+}
+"""
+
+_PREVIEW_CSS = """
+@page {
+    size: A5;
+    margin: 2cm;
+}
+
+body {
+    font-family: 'Georgia', serif;
+    line-height: 1.6;
+    color: #333;
+}
+
+.cover-page {
+    page-break-after: always;
+    text-align: center;
+    padding-top: 8cm;
+}
+
+.book-title {
+    font-family: 'Times New Roman', serif;
+    font-size: 28pt;
+    font-weight: bold;
+    margin-bottom: 2cm;
+    line-height: 1.3;
+    color: #2c1810;
+    text-transform: uppercase;
+    letter-spacing: 2px;
+}
+
+.book-author {
+    font-family: 'Times New Roman', serif;
+    font-size: 18pt;
+    font-style: italic;
+    color: #666;
+    margin-bottom: 4cm;
+    letter-spacing: 1px;
+}
+
+.preview-notice {
+    background-color: #fff3cd;
+    border: 1px solid #ffeaa7;
+    padding: 30px;
+    margin: 50px 0;
+    text-align: center;
+    border-radius: 5px;
+}
+
+.watermark {
+    position: fixed;
+    top: 50%;
+    left: 50%;
+    transform: translate(-50%, -50%) rotate(-45deg);
+    font-size: 48pt;
+    color: rgba(0,0,0,0.1);
+    z-index: -1;
+}
+"""
+
+_EBOOK_TEMPLATE = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8">
         <style>
-            @page {{
+            @page {
                 size: A5;
                 margin: 2cm;
-                @top-left {{
-                    content: "{book.title}";
+                @top-left {
+                    content: "$title";
                     font-size: 10pt;
-                }}
-                @top-right {{
+                }
+                @top-right {
                     content: "Page " counter(page);
                     font-size: 10pt;
-                }}
-            }}
-
-            body {{
-                font-family: 'Georgia', serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-
-            .cover-page {{
-                page-break-after: always;
-                text-align: center;
-                padding-top: 8cm;
-            }}
-
-            .book-title {{
-                font-family: 'Times New Roman', serif;
-                font-size: 28pt;
-                font-weight: bold;
-                margin-bottom: 2cm;
-                line-height: 1.3;
-                color: #2c1810;
-            }}
-
-            .book-author {{
-                font-family: 'Times New Roman', serif;
-                font-size: 18pt;
-                font-style: italic;
-                color: #666;
-                margin-bottom: 4cm;
-            }}
-
-            .publisher {{
-                font-size: 12pt;
-                color: #888;
-                margin-top: 3cm;
-            }}
-
-            .content-page {{
-                page-break-after: always;
-                padding-top: 3cm;
-            }}
-
-            .chapter-title {{
-                font-size: 20pt;
-                font-weight: bold;
-                text-align: center;
-                margin-bottom: 2cm;
-                color: #2c1810;
-            }}
-
-            .content {{
-                font-size: 12pt;
-                text-align: justify;
-            }}
-
-            .notice {{
-                background-color: #f8f9fa;
-                border-left: 4px solid #8B4513;
-                padding: 20px;
-                margin: 20px 0;
-                font-style: italic;
-            }}
-
-            .copyright {{
-                position: fixed;
-                bottom: 2cm;
-                left: 2cm;
-                right: 2cm;
-                text-align: center;
-                font-size: 10pt;
-                color: #666;
-                border-top: 1px solid #ddd;
-                padding-top: 10px;
-            }}
+                }
+            }
+
+            $css
         </style>
     </head>
     <body>
         <!-- Cover Page -->
         <div class="cover-page">
-            <div class="book-title">{book.title}</div>
-            <div class="book-author">by {', '.join([author.name for author in book.authors.all()])}</div>
+            <div class="book-title">$title</div>
+            <div class="book-author">by $authors</div>
             <div class="publisher">BookNook Press</div>
         </div>
 
@@ -112,9 +174,9 @@ def generate_ebook_pdf(book):
         <div class="content-page">
             <div class="chapter-title">About This Book</div>
             <div class="content">
-                <p><strong>Genre:</strong> {book.genre.name}</p>
-                <p><strong>Publication Year:</strong> {book.publication_year}</p>
-                <p><strong>ISBN:</strong> {book.isbn}</p>
+                <p><strong>Genre:</strong> $genre</p>
+                <p><strong>Publication Year:</strong> $year</p>
+                <p><strong>ISBN:</strong> $isbn</p>
 
                 <div class="notice">
                     <p>This is an auto-generated preview of the eBook. The full content is available in the purchased version.</p>
@@ -122,7 +184,7 @@ def generate_ebook_pdf(book):
                 </div>
 
                 <h3>Summary</h3>
-                <p>{book.summary}</p>
+                <p>$summary</p>
             </div>
         </div>
 
@@ -158,7 +220,7 @@ def generate_ebook_pdf(book):
         <div class="content-page">
             <div class="content">
                 <div class="copyright">
-                    © {timezone.now().year} BookNook. All rights reserved.<br>
+                    © $copyright_year BookNook. All rights reserved.<br>
                     This eBook is licensed to the purchaser for personal use only.<br>
                     Unauthorized distribution is prohibited.
                 </div>
@@ -166,82 +228,15 @@ def generate_ebook_pdf(book):
         </div>
     </body>
     </html>
-    """
-
-    pdf_file = BytesIO()
-    pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
-
-    if pisa_status.err:
-        return None
+""")
 
-    pdf_file.seek(0)
-    return pdf_file.getvalue()
-
-
-def generate_preview_pdf(book):
-    """Generate a preview PDF with limited content"""
-
-    html_content = f"""
+_PREVIEW_TEMPLATE = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8">
         <style>
-            @page {{
-                size: A5;
-                margin: 2cm;
-            }}
-
-            body {{
-                font-family: 'Georgia', serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-
-            .cover-page {{
-                page-break-after: always;
-                text-align: center;
-                padding-top: 8cm;
-            }}
-
-            .book-title {{
-                font-family: 'Times New Roman', serif;
-                font-size: 28pt;
-                font-weight: bold;
-                margin-bottom: 2cm;
-                line-height: 1.3;
-                color: #2c1810;
-                text-transform: uppercase;
-                letter-spacing: 2px;
-            }}
-
-            .book-author {{
-                font-family: 'Times New Roman', serif;
-                font-size: 18pt;
-                font-style: italic;
-                color: #666;
-                margin-bottom: 4cm;
-                letter-spacing: 1px;
-            }}
-
-            .preview-notice {{
-                background-color: #fff3cd;
-                border: 1px solid #ffeaa7;
-                padding: 30px;
-                margin: 50px 0;
-                text-align: center;
-                border-radius: 5px;
-            }}
-
-            .watermark {{
-                position: fixed;
-                top: 50%;
-                left: 50%;
-                transform: translate(-50%, -50%) rotate(-45deg);
-                font-size: 48pt;
-                color: rgba(0,0,0,0.1);
-                z-index: -1;
-            }}
+            $css
         </style>
     </head>
     <body>
@@ -249,8 +244,8 @@ def generate_preview_pdf(book):
 
         <!-- Cover Page -->
         <div class="cover-page">
-            <div class="book-title">{book.title}</div>
-            <div class="book-author">by {', '.join([author.name for author in book.authors.all()])}</div>
+            <div class="book-title">$title</div>
+            <div class="book-author">by $authors</div>
             <div style="color: #888; margin-top: 3cm;">BookNook Preview Edition</div>
         </div>
 
@@ -260,16 +255,16 @@ def generate_preview_pdf(book):
 
             <div class="preview-notice">
                 <h2>✨ Book Preview</h2>
-                <p>This is a preview of <strong>"{book.title}"</strong> by {', '.join([author.name for author in book.authors.all()])}.</p>
+                <p>This is a preview of <strong>"$title"</strong> by $authors.</p>
                 <p>The complete eBook includes the full content with proper formatting and additional features.</p>
             </div>
 
             <h3>About This Book</h3>
-            <p><strong>Genre:</strong> {book.genre.name}</p>
-            <p><strong>Published:</strong> {book.publication_year}</p>
+            <p><strong>Genre:</strong> $genre</p>
+            <p><strong>Published:</strong> $year</p>
 
             <h3>Summary</h3>
-            <p>{book.summary}</p>
+            <p>$summary</p>
 
             <div style="text-align: center; margin-top: 3cm; padding: 20px; border-top: 1px solid #ddd;">
                 <p><em>This preview shows the eBook format and quality.</em></p>
@@ -278,13 +273,83 @@ def generate_preview_pdf(book):
         </div>
     </body>
     </html>
-    """
+""")
+
+
+def _book_context(book):
+    """Template fields shared by the eBook and preview PDFs"""
+    return {
+        'title': book.title,
+        'authors': ', '.join(author.name for author in book.authors.all()),
+        'genre': book.genre.name,
+        'year': book.publication_year,
+        'summary': book.summary,
+    }
+
+
+def _pdf_cache_key(prefix, book):
+    # updated_at is part of the key, so saving the book busts the old entry. Rows written
+    # without Book.save (loaddata, bulk_create, .update()) may have none; those are not cached
+    if book.updated_at is None:
+        return None
+    return f'{prefix}:{book.isbn}:{int(book.updated_at.timestamp() * 1_000_000)}'
+
+
+def _cached_pdf(prefix, book, builder):
+    """Return cached PDF bytes for this book snapshot, rendering them on a miss"""
+    key = _pdf_cache_key(prefix, book)
+    if key is None:
+        return builder(book)
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = builder(book)
+        if pdf is not None:
+            cache.set(key, pdf, PDF_CACHE_TIMEOUT)
+    return pdf
+
+
+def generate_ebook_pdf(book):
+    """Generate a dynamic PDF for the eBook"""
+    return _cached_pdf('ebook_pdf', book, _render_ebook_pdf)
+
+
+def generate_preview_pdf(book):
+    """Generate a preview PDF with limited content"""
+    return _cached_pdf('preview_pdf', book, _render_preview_pdf)
+
+
+def generate_pdfs_bulk(books):
+    """Generate eBook PDFs for many books, returning {isbn: pdf bytes}"""
+    books = list(books)
+    keys = {book.isbn: _pdf_cache_key('ebook_pdf', book) for book in books}
+    cached = cache.get_many([key for key in keys.values() if key is not None])
+    pdfs = {isbn: cached[key] for isbn, key in keys.items() if key in cached}
+
+    # Rendered inline: the only caller is an admin request, which must not fork the web worker
+    for book in books:
+        if book.isbn not in pdfs:
+            pdf = _render_ebook_pdf(book)
+            if pdf is not None and keys[book.isbn] is not None:
+                cache.set(keys[book.isbn], pdf, PDF_CACHE_TIMEOUT)
+            pdfs[book.isbn] = pdf
+    return pdfs
+
+
+def _render_ebook_pdf(book):
+    return _render_pdf(_EBOOK_TEMPLATE.substitute(
+        _book_context(book), isbn=book.isbn, copyright_year=timezone.now().year, css=_EBOOK_CSS,
+    ))
+
+
+def _render_preview_pdf(book):
+    return _render_pdf(_PREVIEW_TEMPLATE.substitute(_book_context(book), css=_PREVIEW_CSS))
+
 
+def _render_pdf(html_content):
     pdf_file = BytesIO()
     pisa_status = pisa.CreatePDF(html_content, dest=pdf_file)
 
     if pisa_status.err:
         return None
 
-    pdf_file.seek(0)
     return pdf_file.getvalue()
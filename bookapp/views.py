@@ -1,23 +1,33 @@
+import json
 from datetime import timedelta, datetime
 from decimal import Decimal
+from io import BytesIO
 
 import razorpay
 from django.db.backends.utils import logger
 from django.utils.text import slugify
 from razorpay import Payment
-from django.db.models import Q, Sum, Count
-from django.forms import modelform_factory
-from django.http import JsonResponse, HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, Max, OuterRef, Q, Sum, Count
+from django.http import FileResponse, JsonResponse, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.validators import URLValidator
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.template.defaulttags import now
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.functional import SimpleLazyObject
 
 from BookStore import settings
-from bookapp.forms import UserRegistrationForm
+from bookapp.catalog import catalog_facets, catalog_version
+from bookapp.forms import AdminAuthorForm, AdminBookAddForm, AdminBookEditForm, UserRegistrationForm
 from bookapp.models import Book, Author, Reader, Genre, CartItem, Cart, WishlistItem, Wishlist, Order, OrderItem, Payment
+from bookapp.signals import invalidate_catalog_cache, refresh_cart_totals
 from bookapp.utils import generate_preview_pdf
 
 
@@ -112,7 +122,7 @@ def register(request):
 
 def book_catalog(request):
     """Book catalog with search and filters"""
-    books = Book.objects.all()
+    books = Book.objects.for_listing().with_ebook_price()
 
     # Get filter parameters
     search_query = request.GET.get('q', '')
@@ -121,20 +131,23 @@ def book_catalog(request):
     format_filter = request.GET.get('format', '')
     sort_by = request.GET.get('sort', '')
 
-    # Apply filters
+    # Apply filters; author joins can repeat a book, so DISTINCT is added once at the end
+    needs_distinct = False
     if search_query:
+        # author_names is the denormalized copy of the authors, so search needs no join or DISTINCT
         books = books.filter(
             Q(title__icontains=search_query) |
-            Q(authors__name__icontains=search_query) |
+            Q(author_names__icontains=search_query) |
             Q(tags__icontains=search_query) |
             Q(summary__icontains=search_query)
-        ).distinct()
+        )
 
     if genre_filter:
         books = books.filter(genre__name__icontains=genre_filter)
 
     if author_filter:
         books = books.filter(authors__name__icontains=author_filter)
+        needs_distinct = True
 
     if format_filter == 'ebook':
         books = books.filter(book_type__in=['digital', 'both'])
@@ -153,14 +166,20 @@ def book_catalog(request):
     else:
         books = books.order_by('-publication_year', 'title')
 
-    # Get unique values for filters
-    all_genres = Book.objects.values_list('genre__name', flat=True).distinct()
-    all_authors = Author.objects.values_list('name', flat=True).distinct()
+    if needs_distinct:
+        books = books.distinct()
+
+    # The page body is cached per query string in the template; the page stays lazy, so a cache
+    # hit runs no catalog query at all
+    page_obj = SimpleLazyObject(lambda: Paginator(books, 24).get_page(request.GET.get('page')))
 
     context = {
-        'books': books,
-        'all_genres': all_genres,
-        'all_authors': all_authors,
+        'books': page_obj,
+        'page_obj': page_obj,
+        **catalog_facets(),
+        'catalog_version': catalog_version(),
+        # Per-user, so it is rendered outside the shared cached catalog body
+        'wishlisted_isbns': wishlisted_isbns(request),
         'search_query': search_query,
         'selected_genre': genre_filter,
         'selected_author': author_filter,
@@ -171,25 +190,29 @@ def book_catalog(request):
 
 def book_detail(request, isbn):
     """Book detail page"""
-    book = get_object_or_404(Book, isbn=isbn)
+    books = Book.objects.select_related('genre__parent').prefetch_related('authors')
+    if request.user.is_authenticated:
+        # Wishlist and cart flags come back as two columns of the book query
+        books = books.annotate(
+            in_wishlist=Exists(WishlistItem.objects.filter(book=OuterRef('pk'), wishlist__user=request.user)),
+            in_cart=Exists(CartItem.objects.filter(book=OuterRef('pk'), cart__user=request.user)),
+        )
+    book = get_object_or_404(books, isbn=isbn)
 
-    # Calculate eBook price (75% of paperback)
-    ebook_price = int(float(book.price) * 0.75) if book.price else 0
+    # eBook price to the nearest rupee, in exact decimal arithmetic
+    ebook_price = (book.price * Book.EBOOK_PRICE_RATIO).quantize(Decimal('1'))
 
     # Get other books by the same author(s)
     same_author_books = Book.objects.filter(
-        authors__in=book.authors.all()
+        authors__in=[author.pk for author in book.authors.all()]
     ).exclude(isbn=isbn).distinct()[:6]  # Limit to 6 books
 
-    is_in_wishlist = WishlistItem.objects.filter(book_id=isbn, wishlist__user=request.user).exists()
-    is_in_cart = CartItem.objects.filter(book_id=isbn, cart__user=request.user).exists()
-
     context = {
         'book': book,
         'same_author_books': same_author_books,
         'ebook_price': ebook_price,
-        'is_in_wishlist': is_in_wishlist,
-        'is_in_cart': is_in_cart,
+        'is_in_wishlist': getattr(book, 'in_wishlist', False),
+        'is_in_cart': getattr(book, 'in_cart', False),
     }
     return render(request, 'book_detail.html', context)
 
@@ -197,16 +220,13 @@ def book_detail(request, isbn):
 def get_or_create_cart(request):
     """Get or create cart for authenticated user"""
     if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        return cart
+        return Cart.get_or_create_for(request.user)
     return None
 
 
-@login_required
 def add_to_cart(request, isbn):
     """Add book to cart"""
     book = get_object_or_404(Book, isbn=isbn)
-    cart = get_or_create_cart(request)
 
     if book.book_type == 'digital':
         messages.warning(request, 'eBooks cannot be added to cart. Please use "Buy & Download" instead.')
@@ -216,17 +236,31 @@ def add_to_cart(request, isbn):
         messages.error(request, 'This book is out of stock.')
         return redirect('book_detail', isbn=isbn)
 
-    # Add or update cart item
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        book=book,
-        book_type='physical',  # Explicitly set to physical
-        defaults={'quantity': 1}
-    )
+    if not request.user.is_authenticated:
+        # Anonymous carts live in the session; they are merged into the user's cart on login
+        session_cart = request.session.get(Cart.SESSION_KEY, {})
+        session_cart[isbn] = session_cart.get(isbn, 0) + 1
+        request.session[Cart.SESSION_KEY] = session_cart
+        messages.success(request, f'Added "{book.title}" to cart. Log in to check out.')
+        return redirect('book_detail', isbn=isbn)
 
-    if not created:
-        cart_item.quantity += 1
-        cart_item.save()
+    cart = get_or_create_cart(request)
+
+    # Bump an existing cart item in SQL; only insert when there was nothing to bump
+    cart_items = CartItem.objects.filter(cart=cart, book=book, book_type='physical')
+    updated = cart_items.update(quantity=F('quantity') + 1)
+
+    if not updated:
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(cart=cart, book=book, book_type='physical', quantity=1)  # Explicitly set to physical
+        except IntegrityError:
+            # A concurrent request inserted the same item first; bump that row instead
+            updated = cart_items.update(quantity=F('quantity') + 1)
+
+    if updated:
+        # A queryset update skips the CartItem signals, so refresh the totals here
+        refresh_cart_totals([cart.pk])
         messages.success(request, f'Updated quantity of "{book.title}" in cart.')
     else:
         messages.success(request, f'Added "{book.title}" to cart.')
@@ -271,6 +305,8 @@ def update_cart_quantity(request, item_id):
         # If AJAX request, return JSON response
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             cart = get_or_create_cart(request)
+            # The totals were updated in the database by the cart item signals
+            cart.refresh_from_db(fields=['cached_total_items', 'cached_total_price'])
             return JsonResponse({
                 'success': True,
                 'item_total': cart_item.total_price,
@@ -293,17 +329,16 @@ def cart_detail(request):
 
     cart = get_or_create_cart(request)
     # Force fresh query to get updated quantities and prices
-    cart_items = cart.items.select_related('book').all()
+    cart_items = cart.items.select_related('book').with_line_totals()
 
-    # Recalculate totals to ensure they're fresh
-    cart_total_items = sum(item.quantity for item in cart_items)
-    cart_total_price = sum(item.quantity * item.book.price for item in cart_items)
+    # Recalculate totals in SQL to ensure they're fresh
+    totals = cart.items.totals()
 
     context = {
         'cart': cart,
         'cart_items': cart_items,
-        'cart_total_items': cart_total_items,
-        'cart_total_price': cart_total_price,
+        'cart_total_items': totals['total_items'],
+        'cart_total_price': totals['total_price'],
     }
     return render(request, 'cart.html', context)
 
@@ -323,11 +358,17 @@ def clear_cart(request):
 def get_or_create_wishlist(request):
     """Get or create wishlist for authenticated user"""
     if request.user.is_authenticated:
-        wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-        return wishlist
+        return Wishlist.get_or_create_for(request.user)
     return None
 
 
+def wishlisted_isbns(request):
+    """ISBNs in the user's wishlist, rendered inline so the wishlist hearts need no status request"""
+    if not request.user.is_authenticated:
+        return []
+    return list(WishlistItem.objects.filter(wishlist__user=request.user).values_list('book_id', flat=True))
+
+
 def add_to_wishlist(request, isbn):
     """Add book to wishlist"""
     if not request.user.is_authenticated:
@@ -339,16 +380,16 @@ def add_to_wishlist(request, isbn):
     book = get_object_or_404(Book, isbn=isbn)
     wishlist = get_or_create_wishlist(request)
 
-    # Check if already in wishlist
-    if WishlistItem.objects.filter(wishlist=wishlist, book=book).exists():
+    # Insert straight away; the (wishlist, book) unique constraint reports an existing item
+    try:
+        with transaction.atomic():
+            WishlistItem.objects.create(wishlist=wishlist, book=book)
+    except IntegrityError:
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': False, 'message': 'Book already in wishlist.'})
         messages.info(request, 'This book is already in your wishlist.')
         return redirect('book_detail', isbn=isbn)
 
-    # Add to wishlist
-    WishlistItem.objects.create(wishlist=wishlist, book=book)
-
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': True, 'message': 'Book added to wishlist!'})
 
@@ -436,12 +477,10 @@ def toggle_wishlist_ajax(request, isbn):
         book = get_object_or_404(Book, isbn=isbn)
         wishlist = get_or_create_wishlist(request)
 
-        # Check if already in wishlist
-        wishlist_item = WishlistItem.objects.filter(wishlist=wishlist, book=book).first()
+        # Try the removal first: a plain DELETE both checks and removes in one statement
+        removed, _ = WishlistItem.objects.filter(wishlist=wishlist, book=book).delete()
 
-        if wishlist_item:
-            # Remove from wishlist
-            wishlist_item.delete()
+        if removed:
             action = 'removed'
             message = f'Removed "{book.title}" from wishlist.'
             in_wishlist = False
@@ -466,30 +505,36 @@ def toggle_wishlist_ajax(request, isbn):
         })
 
 
+WISHLIST_STATUS_MAX_ISBNS = 200
+
+
 def check_wishlist_status(request):
     """Check wishlist status for multiple books"""
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'wishlist_status': []})
 
     if request.method == 'POST':
-        import json
-        data = json.loads(request.body)
-        isbns = data.get('isbns', [])
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = None
+        isbns = data.get('isbns', []) if isinstance(data, dict) else None
+        if not isinstance(isbns, list) or not all(isinstance(isbn, str) for isbn in isbns):
+            return JsonResponse({'success': False, 'wishlist_status': []})
+
+        # Dedupe and cap the list so a client can't force an unbounded IN (...) query
+        isbns = list(dict.fromkeys(isbns))[:WISHLIST_STATUS_MAX_ISBNS]
+        if not isbns:
+            return JsonResponse({'success': True, 'wishlist_status': []})
 
         wishlist = get_or_create_wishlist(request)
-        wishlist_items = WishlistItem.objects.filter(
+        wishlisted = set(WishlistItem.objects.filter(
             wishlist=wishlist,
-            book__isbn__in=isbns
-        ).select_related('book')
+            book_id__in=isbns
+        ).values_list('book_id', flat=True))
 
         # Create status list
-        status_list = []
-        for isbn in isbns:
-            in_wishlist = any(item.book.isbn == isbn for item in wishlist_items)
-            status_list.append({
-                'isbn': isbn,
-                'in_wishlist': in_wishlist
-            })
+        status_list = [{'isbn': isbn, 'in_wishlist': isbn in wishlisted} for isbn in isbns]
 
         return JsonResponse({
             'success': True,
@@ -502,10 +547,12 @@ def check_wishlist_status(request):
 @login_required
 def order_list(request):
     """Display user's order history"""
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    orders = Order.objects.filter(user=request.user).for_listing().order_by('-created_at')
+    page_obj = Paginator(orders, 20).get_page(request.GET.get('page'))
 
     context = {
-        'orders': orders
+        'orders': page_obj,
+        'page_obj': page_obj,
     }
     return render(request, 'orders/order_list.html', context)
 
@@ -525,7 +572,7 @@ def order_detail(request, order_id):
 def create_order(request):
     """Create order from cart - show confirmation and process order"""
     cart = get_or_create_cart(request)
-    cart_items = cart.items.select_related('book').all()
+    cart_items = cart.items.select_related('book').with_line_totals()
 
     if not cart_items:
         messages.warning(request, 'Your cart is empty.')
@@ -565,55 +612,59 @@ def create_order(request):
                     'cart_items': cart_items
                 })
 
-            # Create order immediately for both payment methods
-            order = Order.objects.create(
-                user=request.user,
-                total_amount=cart.total_price,
-                shipping_address=shipping_address,
-                payment_method=payment_method,
-                order_status='pending',
-                payment_status='pending'
-            )
+            with transaction.atomic():
+                if payment_method == 'cash_on_delivery':
+                    # Stock is deducted right away, so re-check it with the book rows locked
+                    physical = [item for item in cart_items if item.book.book_type in ['physical', 'both']]
+                    stock = dict(Book.objects.select_for_update().filter(
+                        isbn__in=[item.book_id for item in physical]
+                    ).values_list('isbn', 'stock'))
+                    for item in physical:
+                        if item.quantity > stock.get(item.book_id, 0):
+                            messages.error(request, f'Only {stock.get(item.book_id, 0)} copies of "{item.book.title}" available.')
+                            return redirect('cart_detail')
+
+                # Create order immediately for both payment methods
+                order = Order.objects.create(
+                    user=request.user,
+                    total_amount=cart.total_price,
+                    shipping_address=shipping_address,
+                    payment_method=payment_method,
+                    order_status='pending',
+                    payment_status='pending'
+                )
 
-            # Create order items
-            for cart_item in cart_items:
-                OrderItem.objects.create(
+                # Create order items
+                order.populate_from_cart(cart_items)
+
+                # Create payment record
+                payment_method_code = 'cash_on_delivery' if payment_method == 'cash_on_delivery' else 'razorpay'
+
+                payment = Payment.objects.create(
                     order=order,
-                    book=cart_item.book,
-                    quantity=cart_item.quantity,
-                    price=cart_item.book.price,
-                    book_type='physical' if cart_item.book.book_type in ['physical', 'both'] else 'digital'
+                    user=request.user,
+                    amount=order.total_amount,
+                    payment_method=payment_method_code,
+                    payment_status='pending'
                 )
 
-            # Create payment record
-            payment_method_code = 'cash_on_delivery' if payment_method == 'cash_on_delivery' else 'razorpay'
+                # For COD - confirm order immediately
+                if payment_method == 'cash_on_delivery':
+                    order.order_status = 'confirmed'
+                    order.payment_status = 'completed'
+                    order.save()
 
-            payment = Payment.objects.create(
-                order=order,
-                user=request.user,
-                amount=order.total_amount,
-                payment_method=payment_method_code,
-                payment_status='pending'
-            )
+                    # Update payment status
+                    payment.payment_status = 'completed'
+                    payment.save()
 
-            # For COD - confirm order immediately
-            if payment_method == 'cash_on_delivery':
-                order.order_status = 'confirmed'
-                order.payment_status = 'completed'
-                order.save()
-
-                # Update payment status
-                payment.payment_status = 'completed'
-                payment.save()
+                    # Update stock for physical books
+                    order.deduct_stock()
 
-                # Update stock for physical books
-                for item in order.items.all():
-                    if item.book.book_type in ['physical', 'both']:
-                        item.book.stock -= item.quantity
-                        item.book.save()
+                    # Clear cart
+                    cart.clear()
 
-                # Clear cart
-                cart.clear()
+            if payment_method == 'cash_on_delivery':
                 messages.success(request,
                                  f'Order #{order.order_id} created successfully! We will contact you for delivery.')
                 return redirect('order_detail', order_id=order.order_id)
@@ -762,23 +813,21 @@ def order_payment_success(request):
 
             razorpay_client.utility.verify_payment_signature(params_dict)
 
-            # Update payment record
-            payment.razorpay_payment_id = razorpay_payment_id
-            payment.razorpay_signature = razorpay_signature
-            payment.payment_status = 'completed'
-            payment.save()
+            with transaction.atomic():
+                # Update payment record
+                payment.razorpay_payment_id = razorpay_payment_id
+                payment.razorpay_signature = razorpay_signature
+                payment.payment_status = 'completed'
+                payment.save()
 
-            # Update order
-            order.payment_status = 'completed'
-            order.order_status = 'confirmed'
-            order.paid_at = timezone.now()
-            order.save()
+                # Update order
+                order.payment_status = 'completed'
+                order.order_status = 'confirmed'
+                order.paid_at = timezone.now()
+                order.save()
 
-            # Update stock for physical books
-            for item in order.items.all():
-                if item.book.book_type in ['physical', 'both']:
-                    item.book.stock -= item.quantity
-                    item.book.save()
+                # Update stock for physical books
+                order.deduct_stock()
 
             # Clear cart and session
             cart = get_or_create_cart(request)
@@ -867,14 +916,12 @@ def cancel_order(request, order_id):
         return redirect('order_detail', order_id=order_id)
 
     if request.method == 'POST':
-        order.order_status = 'cancelled'
-        order.save()
+        with transaction.atomic():
+            order.order_status = 'cancelled'
+            order.save(update_fields=['order_status', 'updated_at'])
 
-        # Restore stock for physical books
-        for item in order.items.all():
-            if item.book.book_type in ['physical', 'both']:
-                item.book.stock += item.quantity
-                item.book.save()
+            # Restore stock for physical books
+            order.restore_stock()
 
         messages.success(request, f'Order #{order.order_id} has been cancelled.')
         return redirect('order_list')
@@ -896,9 +943,11 @@ def author_list(request):
 
     # Get alphabet for filtering
     alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    page_obj = Paginator(authors, 24).get_page(request.GET.get('page'))
 
     context = {
-        'authors': authors,
+        'authors': page_obj,
+        'page_obj': page_obj,
         'alphabet': alphabet,
         'selected_letter': letter_filter,
     }
@@ -923,19 +972,17 @@ def new_arrivals(request):
     seven_days_ago = timezone.now() - timedelta(days=7)
 
     # Get books created in the last 7 days, ordered by newest first
-    new_books = Book.objects.filter(
-        created_at__gte=seven_days_ago
-    ).order_by('-created_at')[:10]  # Limit to 10 most recent
+    recent_books = Book.objects.filter(created_at__gte=seven_days_ago)
+    new_books = list(recent_books.order_by('-created_at')[:10])  # Limit to 10 most recent
 
-    # Count total new arrivals (without limit)
-    total_new_arrivals = Book.objects.filter(
-        created_at__gte=seven_days_ago
-    ).count()
+    # Count total new arrivals (without limit); a short page already is the total
+    total_new_arrivals = len(new_books) if len(new_books) < 10 else recent_books.count()
 
     context = {
         'new_books': new_books,
         'total_new_arrivals': total_new_arrivals,
         'seven_days_ago': seven_days_ago.date(),
+        'wishlisted_isbns': wishlisted_isbns(request),
     }
     return render(request, 'new_arrivals.html', context)
 
@@ -950,7 +997,7 @@ def purchase_ebook(request, isbn):
         return redirect('book_detail', isbn=isbn)
 
     # Calculate eBook price (75% of paperback)
-    ebook_price = book.price * Decimal('0.75')
+    ebook_price = (book.price * Book.EBOOK_PRICE_RATIO).quantize(Decimal('0.01'))
 
     # Create pending order first
     order = Order.objects.create(
@@ -1087,18 +1134,19 @@ def handle_ebook_payment_success(request):
 
 def get_ebook_pdf_content(book):
     """
-    Get PDF content for a book - original if available, otherwise generated
-    Returns: (pdf_content, source_type) where source_type is 'original' or 'generated'
+    Get a PDF file object for a book - original if available, otherwise generated
+    Returns: (pdf_file, source_type) where source_type is 'original' or 'generated'
     """
     if book.book_pdf and book.book_pdf.name:
         try:
             if book.book_pdf.storage.exists(book.book_pdf.name):
-                return book.book_pdf.read(), 'original'
+                # Opened lazily so FileResponse streams it in chunks instead of reading it whole
+                return book.book_pdf.storage.open(book.book_pdf.name, 'rb'), 'original'
         except Exception as e:
             logger.error(f"Error reading original PDF for book {book.isbn}: {str(e)}")
 
-    # Fall back to generated PDF
-    return generate_preview_pdf(book), 'generated'
+    # Fall back to generated PDF (already cached as bytes by generate_preview_pdf)
+    return BytesIO(generate_preview_pdf(book) or b''), 'generated'
 
 
 @login_required
@@ -1110,18 +1158,16 @@ def download_ebook_file(request, order_id):
         messages.error(request, 'This order is not paid.')
         return redirect('order_detail', order_id=order_id)
 
-    book = order.items.first().book
+    book = order.items.select_related('book__genre').first().book
     filename = f"{slugify(book.title)}_ebook.pdf"
 
-    # Get PDF content (original or generated)
-    pdf_content, source_type = get_ebook_pdf_content(book)
+    # Get PDF file (original or generated)
+    pdf_file, source_type = get_ebook_pdf_content(book)
 
     logger.info(f"Serving {source_type} PDF for book: {book.title}")
 
-    # Create response with PDF
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    response['Content-Length'] = len(pdf_content)
+    # FileResponse streams the file and sets Content-Length/Content-Disposition itself
+    response = FileResponse(pdf_file, as_attachment=True, filename=filename, content_type='application/pdf')
 
     # Additional headers to prevent caching issues
     response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
@@ -1136,7 +1182,7 @@ def preview_ebook(request, isbn):
     """Generate a preview PDF for the eBook"""
     from .utils import generate_preview_pdf
 
-    book = get_object_or_404(Book, isbn=isbn)
+    book = get_object_or_404(Book.objects.select_related('genre'), isbn=isbn)
 
     if book.book_type not in ['digital', 'both']:
         messages.error(request, 'Preview not available for this book.')
@@ -1145,11 +1191,14 @@ def preview_ebook(request, isbn):
     try:
         # Generate preview PDF (similar to full eBook but with preview limitations)
         pdf_file = generate_preview_pdf(book)
+        if pdf_file is None:
+            raise ValueError('Preview PDF generation failed')
 
-        response = HttpResponse(pdf_file, content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="{book.title.replace(" ", "_")}_preview.pdf"'
-
-        return response
+        return FileResponse(
+            BytesIO(pdf_file),
+            filename=f'{book.title.replace(" ", "_")}_preview.pdf',
+            content_type='application/pdf',
+        )
 
     except Exception as e:
         messages.error(request, 'Error generating preview.')
@@ -1166,22 +1215,27 @@ def admin_book_management(request):
     """Admin book management dashboard"""
     books = Book.objects.all().order_by('-created_at')
 
-    # Quick stats
-    total_books = books.count()
-    low_stock_books = books.filter(stock__lt=5, book_type__in=['physical', 'both']).count()
-    out_of_stock_books = books.filter(stock=0, book_type__in=['physical', 'both']).count()
-
     # Handle POST requests
     if request.method == 'POST':
         response = handle_admin_actions(request, books)
         if response:
             return response
 
+    # One page of rows, with the author column prefetched
+    page_obj = Paginator(books.prefetch_related('authors'), 50).get_page(request.GET.get('page'))
+
+    # Quick stats in one query
+    physical = Q(book_type__in=['physical', 'both'])
+    stats = Book.objects.aggregate(
+        total_books=Count('isbn'),
+        low_stock_books=Count('isbn', filter=physical & Q(stock__lt=5)),
+        out_of_stock_books=Count('isbn', filter=physical & Q(stock=0)),
+    )
+
     context = {
-        'books': books,
-        'total_books': total_books,
-        'low_stock_books': low_stock_books,
-        'out_of_stock_books': out_of_stock_books,
+        'books': page_obj,
+        'page_obj': page_obj,
+        **stats,
     }
     return render(request, 'admin/book_management.html', context)
 
@@ -1209,12 +1263,17 @@ def handle_image_update(request):
 
     if book_isbn and new_image_url:
         try:
-            book = Book.objects.get(isbn=book_isbn)
-            book.cover_image = new_image_url
-            book.save()
-            return JsonResponse({'success': True, 'message': 'Image updated successfully'})
-        except Book.DoesNotExist:
+            URLValidator()(new_image_url)
+        except ValidationError:
+            return JsonResponse({'success': False, 'message': 'Invalid image URL'})
+
+        # One UPDATE of the changed columns; the row count doubles as the existence check
+        updated = Book.objects.filter(isbn=book_isbn).update(cover_image=new_image_url, updated_at=timezone.now())
+        if not updated:
             return JsonResponse({'success': False, 'message': 'Book not found'})
+        # A queryset update sends no post_save, so drop the cached catalog pages here
+        invalidate_catalog_cache(sender=Book)
+        return JsonResponse({'success': True, 'message': 'Image updated successfully'})
 
     return JsonResponse({'success': False, 'message': 'Invalid data'})
 
@@ -1269,15 +1328,8 @@ def handle_restock_action(request, book_isbns):
 
 def handle_toggle_availability(request, book_isbns):
     """Toggle availability for selected books"""
-    books_to_update = Book.objects.filter(isbn__in=book_isbns)
-    updated_count = 0
-
-    for book in books_to_update:
-        # Only toggle physical books
-        if book.book_type in ['physical', 'both']:
-            book.stock = 0 if book.stock > 0 else 10
-            book.save()
-            updated_count += 1
+    # Only physical books are toggled
+    updated_count = Book.objects.filter(isbn__in=book_isbns).toggle_availability()
 
     messages.success(request, f'Updated availability for {updated_count} books.')
     return None
@@ -1288,36 +1340,9 @@ def admin_book_detail(request, isbn):
     """Admin book detail view for both viewing and editing"""
     book = get_object_or_404(Book, isbn=isbn)
 
-    # Create a model form with specific fields - ADD 'book_pdf'
-    BookForm = modelform_factory(
-        Book,
-        fields=[
-            'title', 'authors', 'publication_year', 'price',
-            'summary', 'cover_image', 'book_pdf', 'genre', 'book_type', 'stock'  # Added book_pdf
-        ],
-        labels={
-            'title': 'Book Title',
-            'authors': 'Authors',
-            'publication_year': 'Publication Year',
-            'price': 'Price (₹)',
-            'summary': 'Summary',
-            'cover_image': 'Cover Image URL',
-            'book_pdf': 'eBook PDF File',  # Added label
-            'genre': 'Genre',
-            'book_type': 'Book Type',
-            'stock': 'Stock Quantity'
-        },
-        help_texts={
-            'stock': 'Stock only applies to physical books',
-            'book_type': 'Digital books ignore stock quantity',
-            'cover_image': 'URL to book cover image',
-            'book_pdf': 'Upload PDF file for eBook version. Max 50MB.'  # Added help text
-        }
-    )
-
     if request.method == 'POST':
         # Add request.FILES for file uploads
-        form = BookForm(request.POST, request.FILES, instance=book)
+        form = AdminBookEditForm(request.POST, request.FILES, instance=book)
         if form.is_valid():
             form.save()
             messages.success(request, f'Book "{book.title}" updated successfully!')
@@ -1325,11 +1350,12 @@ def admin_book_detail(request, isbn):
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = BookForm(instance=book)
+        form = AdminBookEditForm(instance=book)
 
     # Get related data for the template
-    all_authors = Author.objects.all().order_by('name')
-    all_genres = Genre.objects.all().order_by('name')
+    # The pickers only render id and name
+    all_authors = Author.objects.only('id', 'name').order_by('name')
+    all_genres = Genre.objects.only('id', 'name').order_by('name')
 
     context = {
         'book': book,
@@ -1345,54 +1371,25 @@ def admin_book_detail(request, isbn):
 @user_passes_test(staff_required)
 def admin_book_add(request):
     """Admin book add view for creating new books"""
-
-    # Create a model form with all required fields
-    BookForm = modelform_factory(
-        Book,
-        fields=[
-            'isbn', 'title', 'authors', 'publication_year', 'price',
-            'summary', 'cover_image', 'genre', 'book_type', 'stock'
-        ],
-        labels={
-            'isbn': 'ISBN *',
-            'title': 'Book Title *',
-            'authors': 'Authors *',
-            'publication_year': 'Publication Year *',
-            'price': 'Price (₹) *',
-            'summary': 'Summary',
-            'cover_image': 'Cover Image URL',
-            'genre': 'Genre',
-            'book_type': 'Book Type *',
-            'stock': 'Stock Quantity'
-        },
-        help_texts={
-            'isbn': 'Unique ISBN identifier for the book',
-            'stock': 'Stock only applies to physical books (default: 0)',
-            'book_type': 'Digital books ignore stock quantity',
-            'cover_image': 'URL to book cover image'
-        }
-    )
-
     if request.method == 'POST':
-        form = BookForm(request.POST)
+        form = AdminBookAddForm(request.POST)
         if form.is_valid():
-            book = form.save(commit=False)
-            # Set created_at and updated_at
-            book.created_at = datetime.now()
-            book.updated_at = datetime.now()
-            book.save()
-            form.save_m2m()  # Save many-to-many relationships (authors)
+            # Book.save() fills created_at/updated_at with one aware timestamp; the book and its
+            # author links are written together or not at all
+            with transaction.atomic():
+                book = form.save()
 
             messages.success(request, f'Book "{book.title}" added successfully!')
             return redirect('admin_book_detail', isbn=book.isbn)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = BookForm(initial={'stock': 0, 'book_type': 'both'})
+        form = AdminBookAddForm(initial={'stock': 0, 'book_type': 'both'})
 
     # Get related data for the template
-    all_authors = Author.objects.all().order_by('name')
-    all_genres = Genre.objects.all().order_by('name')
+    # The pickers only render id and name
+    all_authors = Author.objects.only('id', 'name').order_by('name')
+    all_genres = Genre.objects.only('id', 'name').order_by('name')
 
     context = {
         'form': form,
@@ -1409,10 +1406,6 @@ def admin_author_management(request):
     """Admin author management dashboard"""
     authors = Author.objects.all().order_by('name')
 
-    # Quick stats
-    total_authors = authors.count()
-    authors_with_photos = authors.exclude(photo__isnull=True).exclude(photo='').count()
-
     # Handle bulk actions or individual updates
     if request.method == 'POST':
         action = request.POST.get('action')
@@ -1421,16 +1414,30 @@ def admin_author_management(request):
             author_id = request.POST.get('author_id')
             new_photo_url = request.POST.get('photo_url')
             if author_id and new_photo_url:
-                author = get_object_or_404(Author, id=author_id)
-                author.photo = new_photo_url
-                author.save()
+                try:
+                    URLValidator()(new_photo_url)
+                except ValidationError:
+                    return JsonResponse({'success': False, 'message': 'Invalid photo URL'})
+
+                # One UPDATE of the photo column; the row count doubles as the existence check
+                if not Author.objects.filter(id=author_id).update(photo=new_photo_url):
+                    return JsonResponse({'success': False, 'message': 'Author not found'})
                 return JsonResponse({'success': True, 'message': 'Photo updated successfully'})
             return JsonResponse({'success': False, 'message': 'Invalid data'})
 
+    # Quick stats in one aggregate query
+    stats = Author.objects.aggregate(
+        total_authors=Count('id'),
+        authors_with_photos=Count('id', filter=Q(photo__isnull=False) & ~Q(photo='')),
+    )
+
+    # The table renders one page at a time, with only the columns it shows
+    page_obj = Paginator(authors.only('id', 'name', 'bio', 'photo', 'book_count'), 50).get_page(request.GET.get('page'))
+
     context = {
-        'authors': authors,
-        'total_authors': total_authors,
-        'authors_with_photos': authors_with_photos,
+        'authors': page_obj,
+        'page_obj': page_obj,
+        **stats,
     }
     return render(request, 'admin/author_management.html', context)
 
@@ -1440,31 +1447,18 @@ def admin_author_detail(request, author_id):
     """Admin author detail view for both viewing and editing"""
     author = get_object_or_404(Author, id=author_id)
 
-    # Create a model form
-    AuthorForm = modelform_factory(
-        Author,
-        fields=['name', 'bio', 'photo'],
-        labels={
-            'name': 'Author Name *',
-            'bio': 'Biography',
-            'photo': 'Photo URL'
-        },
-        help_texts={
-            'photo': 'URL to author photo',
-            'bio': 'Brief biography of the author'
-        }
-    )
-
     if request.method == 'POST':
-        form = AuthorForm(request.POST, instance=author)
+        form = AdminAuthorForm(request.POST, instance=author)
         if form.is_valid():
-            form.save()
+            # Write only the columns that changed
+            if form.has_changed():
+                form.save(commit=False).save(update_fields=form.changed_data)
             messages.success(request, f'Author "{author.name}" updated successfully!')
             return redirect('admin_author_detail', author_id=author.id)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = AuthorForm(instance=author)
+        form = AdminAuthorForm(instance=author)
 
     context = {
         'author': author,
@@ -1478,23 +1472,8 @@ def admin_author_detail(request, author_id):
 @user_passes_test(staff_required)
 def admin_author_add(request):
     """Admin author add view for creating new authors"""
-
-    AuthorForm = modelform_factory(
-        Author,
-        fields=['name', 'bio', 'photo'],
-        labels={
-            'name': 'Author Name *',
-            'bio': 'Biography',
-            'photo': 'Photo URL'
-        },
-        help_texts={
-            'photo': 'URL to author photo',
-            'bio': 'Brief biography of the author'
-        }
-    )
-
     if request.method == 'POST':
-        form = AuthorForm(request.POST)
+        form = AdminAuthorForm(request.POST)
         if form.is_valid():
             author = form.save()
             messages.success(request, f'Author "{author.name}" added successfully!')
@@ -1502,7 +1481,7 @@ def admin_author_add(request):
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
-        form = AuthorForm()
+        form = AdminAuthorForm()
 
     context = {
         'form': form,
@@ -1512,101 +1491,87 @@ def admin_author_add(request):
     return render(request, 'admin/author_detail.html', context)
 
 
+def parse_date_param(value, default):
+    """A YYYY-MM-DD query parameter as a date, or `default` when missing or malformed"""
+    try:
+        return parse_date(value or '') or default
+    except ValueError:
+        # Well formed but not a real date, e.g. 2024-02-30
+        return default
+
+
 @user_passes_test(staff_required)
 def admin_order_dashboard(request):
     """Admin order dashboard with date range filtering"""
 
     # Date range handling
-    default_start = (datetime.now() - timedelta(days=7)).date()
-    default_end = datetime.now().date()
-
-    start_date = request.GET.get('start_date', default_start)
-    end_date = request.GET.get('end_date', default_end)
-
-    # Convert string dates to date objects
-    if isinstance(start_date, str):
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        except:
-            start_date = default_start
+    default_end = timezone.localdate()
+    default_start = default_end - timedelta(days=7)
+
+    start_date = parse_date_param(request.GET.get('start_date'), default_start)
+    end_date = parse_date_param(request.GET.get('end_date'), default_end)
+
+    # Half-open datetime range covering whole days; unlike a __date lookup it can use the created_at index
+    range_start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    # Base querysets for the date range
+    orders = Order.objects.filter(created_at__gte=range_start, created_at__lt=range_end)
+    order_items = OrderItem.objects.filter(order__created_at__gte=range_start, order__created_at__lt=range_end)
+
+    def top_books():
+        # Grouped on the book key alone, then titles are looked up for the ten winners
+        rows = list(order_items.values('book_id').annotate(
+            total_sold=Sum('quantity'),
+            revenue=Sum('price')
+        ).order_by('-total_sold', 'book_id')[:10])
+        titles = dict(Book.objects.filter(isbn__in=[row['book_id'] for row in rows]).values_list('isbn', 'title'))
+        for row in rows:
+            row['book__isbn'] = row['book_id']
+            row['book__title'] = titles.get(row['book_id'], '')
+        return rows
+
+    def build():
+        # Order status breakdown
+        status_breakdown = list(orders.values('order_status').annotate(
+            count=Count('order_id'),
+            revenue=Sum('total_amount'),
+            items=Sum('cached_total_items')
+        ).order_by('order_status'))
+
+        # Payment status breakdown
+        payment_breakdown = list(orders.values('payment_status').annotate(
+            count=Count('order_id'),
+            revenue=Sum('total_amount')
+        ).order_by('payment_status'))
+
+        # Book type breakdown
+        book_type_breakdown = list(order_items.values('book_type').annotate(
+            count=Count('id'),
+            total_quantity=Sum('quantity'),
+            revenue=Sum('price')
+        ).order_by('book_type'))
 
-    if isinstance(end_date, str):
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-        except:
-            end_date = default_end
-
-    # Adjust end_date to include the entire day
-    end_date_with_time = datetime.combine(end_date, datetime.max.time())
-
-    # Base queryset for the date range
-    orders = Order.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
-    )
+        return {
+            # Summary statistics, totalled from the breakdown rows rather than re-aggregated
+            'total_orders': sum(row['count'] for row in status_breakdown),
+            'total_revenue': sum(row['revenue'] or 0 for row in status_breakdown),
+            'total_items_sold': sum(row['items'] or 0 for row in status_breakdown),
+            'status_breakdown': status_breakdown,
+            'payment_breakdown': payment_breakdown,
+            'book_type_breakdown': book_type_breakdown,
+            # Recent orders (last 10); the table shows no item details, so items are not fetched at all
+            'recent_orders': list(orders.select_related('user').order_by('-created_at')[:10]),
+            'top_books': top_books(),
+        }
 
-    # Summary statistics
-    total_orders = orders.count()
-    total_revenue = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-    total_items_sold = OrderItem.objects.filter(
-        order__in=orders
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
-
-    # Order status breakdown
-    status_breakdown = orders.values('order_status').annotate(
-        count=Count('order_id'),
-        revenue=Sum('total_amount')
-    ).order_by('order_status')
-
-    # Payment status breakdown
-    payment_breakdown = orders.values('payment_status').annotate(
-        count=Count('order_id'),
-        revenue=Sum('total_amount')
-    ).order_by('payment_status')
-
-    # Book type breakdown
-    book_type_breakdown = OrderItem.objects.filter(
-        order__in=orders
-    ).values('book_type').annotate(
-        count=Count('id'),
-        total_quantity=Sum('quantity'),
-        revenue=Sum('price')
-    ).order_by('book_type')
-
-    # Recent orders (last 10)
-    recent_orders = orders.select_related('user').prefetch_related('items').order_by('-created_at')[:10]
-
-    # Top selling books
-    top_books = OrderItem.objects.filter(
-        order__in=orders
-    ).values(
-        'book__title', 'book__isbn'
-    ).annotate(
-        total_sold=Sum('quantity'),
-        revenue=Sum('price')
-    ).order_by('-total_sold')[:10]
-
-    # Daily revenue trend (last 7 days)
-    daily_revenue = Order.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
-    ).extra(
-        {'date': "date(created_at)"}
-    ).values('date').annotate(
-        revenue=Sum('total_amount'),
-        orders=Count('order_id')
-    ).order_by('date')
+    # Keyed on the latest order change, so new and saved orders show at once; changes made with
+    # queryset updates show within the 60s TTL
+    latest_change = Order.objects.aggregate(latest=Max('updated_at'))['latest']
+    cache_key = f'admin_order_dashboard:{start_date}:{end_date}:{latest_change.timestamp() if latest_change else 0}'
 
     context = {
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
-        'total_items_sold': total_items_sold,
-        'status_breakdown': status_breakdown,
-        'payment_breakdown': payment_breakdown,
-        'book_type_breakdown': book_type_breakdown,
-        'recent_orders': recent_orders,
-        'top_books': top_books,
-        'daily_revenue': daily_revenue,
+        **cache.get_or_set(cache_key, build, 60),
         'start_date': start_date,
         'end_date': end_date,
         'default_start': default_start,